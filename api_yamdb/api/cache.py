@@ -0,0 +1,113 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from api_yamdb.db.replicas import read_from_default
+
+from .conditional import not_modified, not_modified_response
+from .utils import normalize_query
+
+KEY_PREFIX = 'api'
+
+
+def get_cache(alias=None):
+    return caches[alias or settings.API_CACHE_ALIAS]
+
+
+def get_tag_versions(tags):
+    tag_keys = [f'{KEY_PREFIX}:tag:{tag}' for tag in tags]
+    versions = get_cache().get_many(tag_keys)
+    return '.'.join(str(versions.get(key, 0)) for key in tag_keys)
+
+
+def make_key(tags, request):
+    version = get_tag_versions(tags)
+    digest = md5('|'.join((
+        request.path,
+        normalize_query(request.query_params),
+        request.accepted_media_type or '',
+    )).encode()).hexdigest()
+    return f'{KEY_PREFIX}:response:{tags[0]}:{version}:{digest}'
+
+
+def increment(key, delta=1, alias=None):
+    cache = get_cache(alias)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def invalidate(*tags):
+    """Сдвигает версии тегов; ответы со старыми версиями больше не читаются."""
+    for tag in tags:
+        increment(f'{KEY_PREFIX}:tag:{tag}')
+
+
+def count(group, outcome):
+    increment(f'{KEY_PREFIX}:stats:{group}:{outcome}')
+
+
+def get_stats(groups):
+    cache = get_cache()
+    keys = {
+        (group, outcome): f'{KEY_PREFIX}:stats:{group}:{outcome}'
+        for group in groups
+        for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    stats = {group: {'hits': 0, 'misses': 0} for group in groups}
+    for (group, outcome), key in keys.items():
+        stats[group][outcome] = values.get(key, 0)
+    return stats
+
+
+def cached_response(view, handler, tags, request, *args, **kwargs):
+    group = view.cache_tags[0]
+    key = make_key(tags, request)
+    cached = get_cache().get(key)
+    if cached is not None:
+        count(group, 'hits')
+        data, etag = cached
+        if etag is None:
+            return Response(data)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+        return Response(data, headers={'ETag': etag})
+    count(group, 'misses')
+    # Ответ попадёт в кэш для всех клиентов, поэтому читается не с реплики
+    with read_from_default():
+        response = handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        get_cache().set(key, (response.data, response.get('ETag')),
+                        settings.API_CACHE_TIMEOUT)
+    return response
+
+
+class CachedListMixin:
+    """Кэширует ответы list, одинаковые для всех клиентов.
+
+    Ключ ответа включает текущие версии тегов из cache_tags, поэтому
+    обработчики сигналов инвалидируют кэш простым сдвигом версии.
+    """
+    cache_tags = ()
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            self, super().list, self.cache_tags, request, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin:
+    """Кэширует ответы retrieve с тегом отдельного объекта."""
+    cache_tags = ()
+    cache_detail_tag = None
+
+    def retrieve(self, request, *args, **kwargs):
+        tags = (self.cache_tags[0], self.cache_detail_tag.format(**kwargs))
+        return cached_response(
+            self, super().retrieve, tags, request, *args, **kwargs
+        )
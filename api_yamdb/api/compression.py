@@ -0,0 +1,87 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(application/(json|javascript|xml|x-ndjson)|text/)'
+)
+
+
+def gzip_compress(content):
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL,
+                                  zlib.DEFLATED, 31)
+    return compressor.compress(content) + compressor.flush()
+
+
+def brotli_compress(content):
+    return brotli.compress(content, quality=settings.COMPRESSION_BR_QUALITY)
+
+
+COMPRESSORS = {'gzip': gzip_compress}
+if brotli is not None:
+    COMPRESSORS['br'] = brotli_compress
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """Сжимает ответы brotli или gzip по Accept-Encoding клиента.
+
+    Порядок предпочтения задаёт COMPRESSION_ENCODINGS, brotli доступен
+    при установленном пакете Brotli. Не сжимаются потоковые ответы,
+    ответы меньше COMPRESSION_MIN_SIZE, несжимаемые типы и ответы, у
+    которых уже есть Content-Encoding, например выгрузка с ?gzip=1.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = next((name for name in settings.COMPRESSION_ENCODINGS
+                         if name in accepted and name in COMPRESSORS), None)
+        if encoding is None:
+            return response
+        compressed = COMPRESSORS[encoding](response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # Сжатое тело - другое представление, сравнение ETag становится
+        # слабым, как в django.middleware.gzip
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        return response
@@ -0,0 +1,144 @@
+from hashlib import md5
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .perf import timed
+from .utils import normalize_query
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'Объект был изменён, получите его заново'
+    default_code = 'precondition_failed'
+
+
+def make_etag(*parts):
+    return quote_etag(md5(repr(parts).encode()).hexdigest())
+
+
+def strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(header, etag):
+    """Слабое сравнение: W/ добавляет сжатие ответа, версия та же."""
+    if not header:
+        return False
+    etags = {strip_weak(tag) for tag in parse_etags(header)}
+    return '*' in etags or strip_weak(etag) in etags
+
+
+def not_modified(request, etag):
+    return etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag)
+
+
+def not_modified_response(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED,
+                    headers={'ETag': etag})
+
+
+class ConditionalMixin:
+    """Условные запросы по версии объектов.
+
+    list и retrieve отдают ETag и отвечают 304 на совпавший
+    If-None-Match, не сериализуя данные. Изменение и удаление с
+    If-Match выполняются под блокировкой строки и отклоняются с 412,
+    если объект успели изменить.
+    """
+
+    def get_object_etag(self, instance):
+        return make_etag(instance._meta.label, instance.pk, instance.version)
+
+    def get_list_etag(self, queryset):
+        """ETag списка по количеству, последнему id и сумме версий.
+
+        В обычном режиме агрегат заодно заменяет COUNT(*) пагинатора.
+        В keyset-режиме он считается только по окну страницы, чтобы не
+        читать весь список ради одной страницы.
+        """
+        paginator = self.paginator
+        window = None
+        if (hasattr(paginator, 'keyset_window')
+                and paginator.use_cursor(self.request, self)):
+            window = paginator.keyset_window(queryset, self.request, self)
+        state = (queryset.order_by() if window is None else window).aggregate(
+            count=Count('pk'), last=Max('pk'), versions=Sum('version')
+        )
+        self.list_count = state['count']
+        self.queryset_count = state['count'] if window is None else None
+        return make_etag(
+            queryset.model._meta.label,
+            normalize_query(self.request.query_params),
+            self.request.accepted_media_type,
+            state['count'], state['last'], state['versions'],
+        )
+
+    def lock_for_update(self):
+        return (self.request.method not in SAFE_METHODS
+                and 'HTTP_IF_MATCH' in self.request.META)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.lock_for_update():
+            return queryset
+        return queryset.select_for_update(of=('self',))
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.lock_for_update() and not etag_matches(
+            self.request.META['HTTP_IF_MATCH'],
+            self.get_object_etag(instance)
+        ):
+            raise PreconditionFailed
+        self.object = instance
+        return instance
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = self.get_list_etag(queryset)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+        response = self.list_response(queryset)
+        response['ETag'] = etag
+        return response
+
+    def list_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            with timed('serialize'):
+                data = serializer.data
+            return self.get_paginated_response(data)
+        serializer = self.get_serializer(queryset, many=True)
+        with timed('serialize'):
+            return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_object_etag(instance)
+        variant = normalize_query(request.query_params)
+        if variant:
+            # Разные наборы полей - разные представления одного объекта
+            etag = make_etag(etag, variant)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+        serializer = self.get_serializer(instance)
+        with timed('serialize'):
+            data = serializer.data
+        return Response(data, headers={'ETag': etag})
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().update(request, *args, **kwargs)
+        response['ETag'] = self.get_object_etag(self.object)
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
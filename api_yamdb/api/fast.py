@@ -0,0 +1,210 @@
+"""Быстрая сериализация списков из строк .values().
+
+ModelSerializer на каждой строке заново обходит поля, достаёт атрибуты
+моделей и проверяет None. Для чтения списка план полей строится один раз
+по уже настроенному сериализатору (с учётом ?fields= и ?expand=): какие
+колонки выбрать через .values() и как из строки получить значение
+каждого поля. Значения проходят через to_representation тех же полей,
+поэтому ответ совпадает с ответом сериализатора байт в байт.
+
+Поддерживаются поля модели, связи ForeignKey через SlugRelatedField или
+вложенный сериализатор и ManyToMany верхнего уровня, которые выбираются
+одним запросом к промежуточной таблице. На остальных полях (source='*',
+свойства модели, SerializerMethodField) план не строится, и список
+сериализуется обычным способом.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import (ManyRelatedField, RelatedField,
+                                      SlugRelatedField)
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from .perf import timed
+
+
+class Plan:
+    """Колонки .values() и функции, строящие поля из строки."""
+
+    def __init__(self, model, prefix=''):
+        self.model = model
+        self.prefix = prefix
+        self.columns = set()
+        self.getters = []
+        self.prefetches = []
+
+    def column(self, name):
+        column = f'{self.prefix}{name}'
+        self.columns.add(column)
+        return column
+
+    def row(self, row, related):
+        return {name: get(row, related) for name, get in self.getters}
+
+    def render(self, rows):
+        pk = self.column(self.model._meta.pk.name)
+        ids = [row[pk] for row in rows]
+        related = {name: fetch(ids) for name, fetch in self.prefetches}
+        return [self.row(row, related) for row in rows]
+
+
+def value_getter(column, to_representation):
+    def get(row, related):
+        value = row[column]
+        return None if value is None else to_representation(value)
+    return get
+
+
+def foreign_key_getter(plan, field, model_field):
+    fk = plan.column(model_field.name)
+    if isinstance(field, SlugRelatedField):
+        column = plan.column(f'{model_field.name}__{field.slug_field}')
+
+        def get(row, related):
+            return None if row[fk] is None else row[column]
+        return get
+    if not isinstance(field, BaseSerializer) or isinstance(
+        field, ListSerializer
+    ):
+        return None
+    nested = build_plan(field, model_field.related_model,
+                        f'{plan.prefix}{model_field.name}__')
+    if nested is None or nested.prefetches:
+        return None
+    plan.columns |= nested.columns
+
+    def get(row, related):
+        return None if row[fk] is None else nested.row(row, related)
+    return get
+
+
+def related_ordering(model, prefix):
+    ordering = []
+    for name in model._meta.ordering:
+        if not isinstance(name, str):
+            return None
+        if name.startswith('-'):
+            ordering.append(f'-{prefix}{name[1:]}')
+        else:
+            ordering.append(f'{prefix}{name}')
+    return ordering
+
+
+def many_child(field, model, prefix):
+    """План элемента связи ManyToMany и функция, строящая его из строки."""
+    if isinstance(field, ManyRelatedField) and isinstance(
+        field.child_relation, SlugRelatedField
+    ):
+        child = Plan(model, prefix)
+        column = child.column(field.child_relation.slug_field)
+        return child, lambda row: row[column]
+    if not isinstance(field, ListSerializer):
+        return None
+    child = build_plan(field.child, model, prefix)
+    if child is None or child.prefetches:
+        return None
+    return child, lambda row: child.row(row, None)
+
+
+def many_to_many_getter(plan, field, model_field):
+    """Связь ManyToMany, выбираемая одним запросом на страницу.
+
+    Порядок как у prefetch_related: по Meta.ordering связанной модели.
+    """
+    if plan.prefix:
+        return None
+    through = model_field.remote_field.through
+    source = model_field.m2m_field_name()
+    target = model_field.m2m_reverse_field_name()
+    planned = many_child(field, model_field.related_model, f'{target}__')
+    if planned is None:
+        return None
+    child, convert = planned
+    ordering = related_ordering(child.model, child.prefix)
+    if ordering is None:
+        return None
+
+    def fetch(ids):
+        grouped = {pk: [] for pk in ids}
+        if ids:
+            rows = through.objects.filter(
+                **{f'{source}__in': ids}
+            ).order_by(*ordering).values(source, *child.columns)
+            for row in rows:
+                grouped[row[source]].append(convert(row))
+        return grouped
+
+    name = field.field_name
+    pk = plan.column(plan.model._meta.pk.name)
+    plan.prefetches.append((name, fetch))
+
+    def get(row, related):
+        return related[name][row[pk]]
+    return get
+
+
+def field_getter(plan, field):
+    if field.source == '*' or '.' in field.source:
+        return None
+    try:
+        model_field = plan.model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if model_field.many_to_many:
+        return many_to_many_getter(plan, field, model_field)
+    if model_field.many_to_one or model_field.one_to_one:
+        if not model_field.concrete:
+            return None
+        return foreign_key_getter(plan, field, model_field)
+    if model_field.is_relation or isinstance(
+        field, (BaseSerializer, RelatedField, ManyRelatedField)
+    ):
+        return None
+    return value_getter(plan.column(field.source), field.to_representation)
+
+
+def build_plan(serializer, model, prefix=''):
+    """План для сериализатора или None, если поля не сводятся к колонкам."""
+    plan = Plan(model, prefix)
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        getter = field_getter(plan, field)
+        if getter is None:
+            return None
+        plan.getters.append((field.field_name, getter))
+    return plan
+
+
+class FastListMixin:
+    """list для безопасных запросов собирает ответ из строк .values().
+
+    Выключается настройкой API_FAST_SERIALIZERS. Если план не строится,
+    список сериализуется как обычно.
+    """
+
+    def get_list_plan(self, queryset):
+        if (not settings.API_FAST_SERIALIZERS
+                or self.request.method not in SAFE_METHODS):
+            return None
+        return build_plan(self.get_serializer(), queryset.model)
+
+    def list_response(self, queryset):
+        plan = self.get_list_plan(queryset)
+        if plan is None:
+            return super().list_response(queryset)
+        plan.column(queryset.model._meta.pk.name)
+        # Курсор следующей страницы строится по колонкам сортировки
+        keyset = {field.lstrip('-')
+                  for field in getattr(self, 'keyset_ordering', None) or ()}
+        rows = queryset.prefetch_related(None).values(
+            *sorted(plan.columns | keyset)
+        )
+        page = self.paginate_queryset(rows)
+        if page is None:
+            with timed('serialize'):
+                return Response(plan.render(list(rows)))
+        with timed('serialize'):
+            data = plan.render(page)
+        return self.get_paginated_response(data)
@@ -1,6 +1,9 @@
 from django_filters import rest_framework
+from rest_framework.filters import BaseFilterBackend
 from reviews.models import Title
 
+from .search import get_search_backend
+
 
 class TitleFilter(rest_framework.FilterSet):
     name = rest_framework.CharFilter(
@@ -19,3 +22,14 @@ class TitleFilter(rest_framework.FilterSet):
     class Meta:
         model = Title
         fields = ['name', 'year', 'genre', 'category']
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Поиск по названию и описанию с ранжированием результатов."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        return get_search_backend().search(queryset, term)
@@ -0,0 +1,14 @@
+from api.cache import invalidate
+from api.search import get_search_backend
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс произведений'
+
+    def handle(self, *args, **options):
+        indexed = get_search_backend().rebuild()
+        invalidate('titles')
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано произведений: {indexed}'
+        ))
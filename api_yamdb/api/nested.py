@@ -0,0 +1,39 @@
+from django.shortcuts import get_object_or_404
+
+
+class NestedParentMixin:
+    """Родительский объект вложенного маршрута: отзывы произведения,
+    комментарии отзыва.
+
+    Дочерние строки фильтруются по id родителя из адреса, без отдельного
+    запроса к родителю: найденный объект или непустой список уже
+    подтверждают, что родитель существует. Родитель загружается только
+    для создания и для пустого списка, не больше одного раза за запрос.
+    parent_lookups сопоставляет поля родителя аргументам маршрута,
+    child_lookups - те же аргументы полям дочерней модели.
+    """
+    parent_model = None
+    parent_lookups = {}
+    child_lookups = {}
+
+    def get_parent(self):
+        if not hasattr(self, 'parent'):
+            self.parent = get_object_or_404(self.parent_model, **{
+                field: self.kwargs.get(kwarg)
+                for field, kwarg in self.parent_lookups.items()
+            })
+        return self.parent
+
+    def get_queryset(self):
+        return self.serializer_class.Meta.model.objects.filter(**{
+            field: self.kwargs.get(kwarg)
+            for field, kwarg in self.child_lookups.items()
+        })
+
+    def get_list_etag(self, queryset):
+        etag = super().get_list_etag(queryset)
+        if self.list_count:
+            return etag
+        # Пустой список: отличаем родителя без детей от несуществующего
+        self.get_parent()
+        return etag
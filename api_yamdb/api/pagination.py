@@ -0,0 +1,171 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.mediatypes import _MediaType
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CountedPaginator(Paginator):
+    """Paginator, принимающий уже посчитанное количество объектов."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class KeysetPagination(PageNumberPagination):
+    """Постраничная навигация с опциональным keyset-режимом.
+
+    По умолчанию ведёт себя как PageNumberPagination. Если представление
+    задаёт keyset_ordering, а клиент передал ?pagination=cursor, ?cursor=
+    или Accept: application/json; pagination=cursor, следующая страница
+    выбирается условием по последней записи вместо OFFSET и без COUNT(*).
+    Если keyset_ordering равно None, например для ранжированного поиска,
+    курсор не применяется и ответ строится по номерам страниц.
+    В обычном режиме переиспользует view.queryset_count, если
+    представление уже посчитало объекты.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def use_cursor(self, request, view):
+        if getattr(view, 'keyset_ordering', None) is None:
+            return False
+        if self.cursor_query_param in request.query_params:
+            return True
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            return True
+        media_type = _MediaType(request.accepted_media_type or '')
+        mode = media_type.params.get(self.mode_query_param, b'')
+        return force_str(mode) == self.cursor_mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_cursor(request, view)
+        if not self.keyset:
+            self.django_paginator_class = partial(
+                CountedPaginator, count=getattr(view, 'queryset_count', None)
+            )
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        results = list(self.keyset_window(queryset, request, view))
+        position, reverse = self.position, self.reverse
+        has_more = len(results) > page_size
+        self.page = results[:page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def keyset_window(self, queryset, request, view):
+        """Строки keyset-страницы и одна следующая, ещё не выбранные.
+
+        Условие по курсору и LIMIT читают только окно страницы по
+        индексу сортировки, сколько бы строк ни было в списке.
+        """
+        self.ordering = view.keyset_ordering
+        self.model = queryset.model
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.after(ordering, self.position))
+        return queryset[:self.get_page_size(request) + 1]
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def get_field(self, field):
+        return self.model._meta.get_field(field.lstrip('-'))
+
+    def after(self, ordering, position):
+        """Условие «строго после позиции» для составного ключа сортировки."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def position_value(self, instance, field):
+        """Значение поля сортировки у объекта или строки .values()."""
+        if isinstance(instance, dict):
+            return instance[field.lstrip('-')]
+        return self.get_field(field).value_from_object(instance)
+
+    def encode_cursor(self, instance, reverse):
+        position = [
+            str(self.position_value(instance, field))
+            for field in self.ordering
+        ]
+        cursor = urlsafe_b64encode(
+            json.dumps({'p': position, 'r': reverse}).encode()
+        ).decode()
+        url = remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            # encode_cursor пишет значения строками; null, числа и
+            # вложенные структуры в курсор попадают только подделкой
+            if not all(isinstance(value, str) for value in cursor['p']):
+                raise ValueError
+            position = [
+                self.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, cursor['p'])
+            ]
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return position, bool(cursor['r'])
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,224 @@
+"""Замеры запроса: SQL, время базы, сериализации и представления.
+
+PerfMiddleware на время запроса оборачивает выполнение SQL на всех
+соединениях и собирает число запросов, их суммарное время и повторы
+одного и того же запроса с теми же параметрами. Сериализация
+замеряется в местах, где строятся данные ответа (timed('serialize')).
+
+Итоги запроса пишутся строкой лога api.perf, при PERF_SERVER_TIMING
+добавляются в заголовок Server-Timing и складываются счётчиками по
+маршрутам в отдельный кэш PERF_CACHE_ALIAS, откуда их в формате
+Prometheus отдаёт /api/v1/metrics/.
+"""
+import logging
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.urls import URLPattern, get_resolver
+
+from . import cache
+
+logger = logging.getLogger('api.perf')
+
+_current = ContextVar('perf_stats', default=None)
+
+# Счётчики маршрута; время хранится целыми микросекундами
+COUNTERS = {
+    'db_queries_total': 'Число SQL-запросов',
+    'duplicate_queries_total': 'Число повторов SQL-запроса с теми же '
+                               'параметрами',
+    'db_seconds_total': 'Время SQL-запросов',
+    'serialize_seconds_total': 'Время сериализации',
+}
+MICROSECONDS = 1_000_000
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.timings = Counter()
+        self.view_started = None
+
+    def add_query(self, sql, params, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.statements[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, params, perf_counter() - started)
+
+
+@contextmanager
+def timed(name):
+    """Добавляет время блока к замеру name текущего запроса."""
+    stats = _current.get()
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.timings[name] += perf_counter() - started
+
+
+def route_name(match):
+    return match.view_name if match is not None else None
+
+
+def route_names(patterns=None, namespace=''):
+    """Имена всех маршрутов, как их записывает ResolverMatch.view_name."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLPattern):
+            yield namespace + (pattern.name or pattern.lookup_str)
+        else:
+            prefix = f'{pattern.namespace}:' if pattern.namespace else ''
+            yield from route_names(pattern.url_patterns, namespace + prefix)
+
+
+def metric_key(route, name):
+    return f'{cache.KEY_PREFIX}:perf:{route}:{name}'
+
+
+def bucket_name(duration):
+    for bound in settings.PERF_BUCKETS:
+        if duration <= bound:
+            return f'bucket:{bound}'
+    return 'bucket:+Inf'
+
+
+def increment(key, value=1):
+    cache.increment(key, value, alias=settings.PERF_CACHE_ALIAS)
+
+
+def store(route, stats, duration):
+    increment(metric_key(route, bucket_name(duration)))
+    increment(metric_key(route, 'seconds_sum'), int(duration * MICROSECONDS))
+    values = {
+        'db_queries_total': stats.queries,
+        'duplicate_queries_total': stats.duplicates,
+        'db_seconds_total': int(stats.db_time * MICROSECONDS),
+        'serialize_seconds_total': int(
+            stats.timings['serialize'] * MICROSECONDS
+        ),
+    }
+    for name, value in values.items():
+        if value:
+            increment(metric_key(route, name), value)
+
+
+def server_timing(stats, duration):
+    parts = [
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries, '
+        f'{stats.duplicates} duplicate"',
+    ]
+    parts.extend(f'{name};dur={value * 1000:.1f}'
+                 for name, value in stats.timings.items())
+    parts.append(f'total;dur={duration * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class PerfMiddleware:
+    """Собирает замеры запроса, см. описание модуля."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        finished = perf_counter()
+        duration = finished - started
+        if stats.view_started is not None:
+            stats.timings['view'] = finished - stats.view_started
+        route = route_name(getattr(request, 'resolver_match', None))
+        logger.info(
+            'method=%s route=%s status=%s queries=%d duplicates=%d '
+            'db_ms=%.1f serialize_ms=%.1f view_ms=%.1f total_ms=%.1f',
+            request.method, route, response.status_code, stats.queries,
+            stats.duplicates, stats.db_time * 1000,
+            stats.timings['serialize'] * 1000,
+            stats.timings['view'] * 1000, duration * 1000,
+        )
+        if route is not None and settings.PERF_METRICS:
+            store(route, stats, duration)
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(stats, duration)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _current.get().view_started = perf_counter()
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_metrics():
+    """Счётчики маршрутов в текстовом формате Prometheus."""
+    bounds = [*map(str, settings.PERF_BUCKETS), '+Inf']
+    names = [*(f'bucket:{bound}' for bound in bounds), 'seconds_sum',
+             *COUNTERS]
+    keys = {metric_key(route, name): (route, name)
+            for route in set(route_names()) for name in names}
+    metrics = {}
+    values = cache.get_cache(settings.PERF_CACHE_ALIAS).get_many(keys)
+    for key, value in values.items():
+        route, name = keys[key]
+        if 'seconds' in name:
+            value /= MICROSECONDS
+        metrics.setdefault(route, {})[name] = value
+
+    lines = [
+        '# HELP api_request_duration_seconds Время ответа на запрос',
+        '# TYPE api_request_duration_seconds histogram',
+    ]
+    for route, route_metrics in sorted(metrics.items()):
+        label = f'route="{escape_label(route)}"'
+        total = 0
+        for bound in bounds:
+            total += route_metrics.get(f'bucket:{bound}', 0)
+            lines.append(f'api_request_duration_seconds_bucket'
+                         f'{{{label},le="{bound}"}} {total}')
+        lines.append(f'api_request_duration_seconds_sum{{{label}}} '
+                     f'{route_metrics.get("seconds_sum", 0)}')
+        lines.append(f'api_request_duration_seconds_count{{{label}}} '
+                     f'{total}')
+    for name, description in COUNTERS.items():
+        lines.append(f'# HELP api_request_{name} {description}')
+        lines.append(f'# TYPE api_request_{name} counter')
+        lines.extend(
+            f'api_request_{name}{{route="{escape_label(route)}"}} '
+            f'{route_metrics.get(name, 0)}'
+            for route, route_metrics in sorted(metrics.items())
+        )
+    return '\n'.join(lines) + '\n'
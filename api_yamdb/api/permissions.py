@@ -47,3 +47,11 @@ class IsAdminModeratorOwner(permissions.BasePermission):
         return (obj.author == request.user
                 or (request.user.is_authenticated and request.user.is_admin)
                 )
+
+
+class IsAdminOrModerator(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return (request.user.is_authenticated
+                and (request.user.is_admin
+                     or request.user.is_moderator
+                     or request.user.is_superuser))
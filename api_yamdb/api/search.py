@@ -0,0 +1,153 @@
+import math
+import re
+from collections import Counter, defaultdict
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, When
+from reviews.models import Title
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class PostgresSearchBackend:
+    """Полнотекстовый поиск по tsvector с GIN-индексом.
+
+    Совпадения по словам дополняются триграммным сходством названия,
+    чтобы находились опечатки и части слов. Оба условия обслуживаются
+    GIN-индексами из миграции reviews.0006.
+    """
+
+    def get_vector(self):
+        config = settings.TITLE_SEARCH_CONFIG
+        return (SearchVector('name', weight='A', config=config)
+                + SearchVector('description', weight='B', config=config))
+
+    def search(self, queryset, term):
+        query = SearchQuery(term, config=settings.TITLE_SEARCH_CONFIG)
+        return queryset.filter(
+            Q(search_vector=query) | Q(name__trigram_similar=term)
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+            + TrigramSimilarity('name', term)
+        ).order_by('-search_rank', 'name', 'id')
+
+    def index(self, titles):
+        Title.objects.filter(
+            pk__in=[title.pk for title in titles]
+        ).update(search_vector=self.get_vector())
+
+    def remove(self, title_id):
+        """Строка удалена вместе с вектором, делать ничего не нужно."""
+
+    def rebuild(self):
+        return Title.objects.update(search_vector=self.get_vector())
+
+
+class InMemorySearchBackend:
+    """Инвертированный индекс в памяти процесса для SQLite.
+
+    Индекс строится при первом поиске и обновляется сигналами при
+    сохранении произведений в этом же процессе. Ранжирование - TF-IDF,
+    совпадение в названии весит больше, чем в описании.
+    """
+    field_weights = {'name': 1.0, 'description': 0.4}
+
+    def __init__(self):
+        self.lock = Lock()
+        self.postings = None
+        self.documents = {}
+
+    def tokens(self, title):
+        weights = Counter()
+        for field, weight in self.field_weights.items():
+            for token in tokenize(getattr(title, field) or ''):
+                weights[token] += weight
+        return weights
+
+    def add(self, title):
+        self.remove_locked(title.pk)
+        weights = self.tokens(title)
+        self.documents[title.pk] = weights
+        for token, weight in weights.items():
+            self.postings[token][title.pk] = weight
+
+    def remove_locked(self, title_id):
+        for token in self.documents.pop(title_id, ()):
+            self.postings[token].pop(title_id, None)
+
+    def rebuild(self):
+        with self.lock:
+            self.postings = defaultdict(dict)
+            self.documents = {}
+            titles = Title.objects.only(*self.field_weights).iterator()
+            for title in titles:
+                self.add(title)
+            return len(self.documents)
+
+    def reset(self):
+        with self.lock:
+            self.postings = None
+            self.documents = {}
+
+    def ensure_built(self):
+        if self.postings is None:
+            self.rebuild()
+
+    def index(self, titles):
+        if self.postings is None:
+            return
+        with self.lock:
+            for title in titles:
+                self.add(title)
+
+    def remove(self, title_id):
+        if self.postings is None:
+            return
+        with self.lock:
+            self.remove_locked(title_id)
+
+    def rank(self, term):
+        self.ensure_built()
+        scores = Counter()
+        total = len(self.documents) or 1
+        with self.lock:
+            for token in set(tokenize(term)):
+                matches = Counter()
+                for key, postings in self.postings.items():
+                    if key.startswith(token):
+                        matches.update(postings)
+                idf = math.log(1 + total / (1 + len(matches)))
+                for title_id, weight in matches.items():
+                    scores[title_id] += weight * idf
+        return [title_id for title_id, _ in scores.most_common()]
+
+    def search(self, queryset, term):
+        ranked = self.rank(term)
+        return queryset.filter(pk__in=ranked).annotate(
+            search_rank=Case(
+                *[When(pk=pk, then=-position)
+                  for position, pk in enumerate(ranked)],
+                output_field=IntegerField(),
+            )
+        ).order_by('-search_rank', 'name', 'id')
+
+
+_backends = {}
+
+
+def get_search_backend():
+    vendor = connection.vendor
+    if vendor not in _backends:
+        if vendor == 'postgresql':
+            _backends[vendor] = PostgresSearchBackend()
+        else:
+            _backends[vendor] = InMemorySearchBackend()
+    return _backends[vendor]
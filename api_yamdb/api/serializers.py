@@ -1,46 +1,40 @@
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.tokens import default_token_generator
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
-from rest_framework.validators import UniqueTogetherValidator
 from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (SCORES, Category, Comment, Genre, Review, Title,
+                            TitleRanking, score_field)
 from users.models import User
 
+from .sparse import SparseFieldsetMixin
 
-class ValueFromViewKeyWordArgumentsDefault:
-    requires_context = True
+REVIEW_EXISTS = ('Поля author, title должны производить массив с '
+                 'уникальными значениями.')
 
-    def __init__(self, context_key):
-        self.key = context_key
 
-    def __call__(self, serializer_field):
-        return serializer_field.context.get('view').kwargs.get(self.key)
-
-    def __repr__(self):
-        return '%s()' % self.__class__.__name__
-
-
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Отзыв; повторный отзыв автора отклоняет ReviewViewSet по
+    ограничению unique_review_author."""
     author = SlugRelatedField(default=serializers.CurrentUserDefault(),
                               slug_field='username',
                               read_only=True)
-    title = serializers.HiddenField(
-        default=ValueFromViewKeyWordArgumentsDefault('title_id'))
+
+    # Превью по ?expand=latest_comments, см. Review.with_latest_comments
+    expandable_fields = {
+        'latest_comments': lambda: CommentSerializer(many=True,
+                                                     read_only=True),
+    }
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date', 'title')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Review.objects.all(),
-                fields=('author', 'title')
-            )
-        ]
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True)
 
@@ -49,30 +43,64 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date',)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug',)
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug',)
 
 
-class TitleListSerializer(serializers.ModelSerializer):
+class TitleListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     genre = GenreSerializer(many=True,
                             read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(required=False)
 
+    compact_fields = {
+        'genre': lambda: SlugRelatedField(
+            slug_field='slug', many=True, read_only=True
+        ),
+        'category': lambda: SlugRelatedField(
+            slug_field='slug', read_only=True
+        ),
+    }
+
     class Meta:
         model = Title
         fields = ('id', 'genre', 'category', 'rating', 'name', 'year',
                   'description',)
 
 
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Распределение оценок по счётчикам произведения."""
+    count = serializers.IntegerField(source='rating_count')
+    mean = serializers.FloatField(source='mean_score')
+    median = serializers.FloatField(source='median_score')
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+    # Поля модели, которых достаточно для ответа
+    model_fields = ('id', 'rating_sum', 'rating_count',
+                    *(score_field(score) for score in SCORES))
+
+    class Meta:
+        model = Title
+        fields = ('id', 'count', 'mean', 'median', 'histogram')
+
+
+class TitleRankingSerializer(serializers.ModelSerializer):
+    title = TitleListSerializer(read_only=True)
+
+    class Meta:
+        model = TitleRanking
+        fields = ('position', 'score', 'reviews_count', 'refreshed_at',
+                  'title')
+
+
 class TitlePostSerializer(serializers.ModelSerializer):
     genre = SlugRelatedField(slug_field='slug',
                              many=True,
@@ -86,7 +114,41 @@ class TitlePostSerializer(serializers.ModelSerializer):
                   'description',)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class TitleBatchSerializer(TitlePostSerializer):
+    """Элемент пакетного создания: slug связей разрешает представление.
+
+    Поля обязательны, как и в TitlePostSerializer, но существование
+    категорий и жанров проверяется одним запросом на весь пакет.
+    """
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+
+class ReviewBatchSerializer(ReviewSerializer):
+    """Элемент пакетного создания отзывов.
+
+    Произведение передаётся в теле, уникальность пары автор-произведение
+    проверяется одним запросом на весь пакет.
+    """
+    title = serializers.IntegerField(min_value=1)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
+
+
+class BatchSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.DictField(),
+                                  allow_empty=False,
+                                  max_length=settings.BATCH_MAX_SIZE)
+
+
+class BatchDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1),
+                                allow_empty=False,
+                                max_length=settings.BATCH_MAX_SIZE)
+
+
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         fields = (
             'username', 'email', 'first_name', 'last_name', 'bio', 'role'
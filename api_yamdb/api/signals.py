@@ -0,0 +1,146 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .authentication import user_tag
+from .cache import invalidate
+from .search import get_search_backend
+
+
+def stored_values(instance, *fields):
+    """Значения полей в базе перед сохранением; None для новой строки.
+
+    Внутри транзакции строка блокируется до её конца, и параллельное
+    изменение прочитает уже записанные значения.
+    """
+    if instance._state.adding:
+        return None
+    rows = type(instance)._base_manager.filter(pk=instance.pk)
+    if transaction.get_connection().in_atomic_block:
+        rows = rows.select_for_update()
+    return rows.values_list(*fields).first()
+
+
+def invalidate_on_commit(*tags):
+    """Инвалидирует сразу и ещё раз после фиксации транзакции.
+
+    Повторный сдвиг версии отбрасывает ответы, закэшированные
+    параллельными запросами по данным до фиксации.
+    """
+    invalidate(*tags)
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, **kwargs):
+    invalidate_on_commit('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre(sender, **kwargs):
+    invalidate_on_commit('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate_on_commit('titles-list', f'title:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genre(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        tags = [f'title:{pk}' for pk in pk_set or ()] or ['titles']
+    else:
+        tags = [f'title:{instance.pk}']
+    invalidate_on_commit('titles-list', *tags)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    invalidate_on_commit('titles-list', f'title:{instance.title_id}')
+
+
+@receiver(pre_save, sender=Review)
+def remember_score(sender, instance, raw, **kwargs):
+    instance.stored_score = None if raw else stored_values(
+        instance, 'title_id', 'score'
+    )
+
+
+@receiver(post_save, sender=Review)
+def count_score(sender, instance, created, raw, **kwargs):
+    """Учитывает оценку в рейтинге произведения при любом сохранении
+    отзыва: через API, админку или код."""
+    if raw:
+        return
+    stored = None if created else instance.stored_score
+    if stored is None:
+        Title.objects.change_rating(instance.title_id,
+                                    added=[instance.score])
+    elif stored != (instance.title_id, instance.score):
+        title_id, score = stored
+        if title_id == instance.title_id:
+            Title.objects.change_rating(title_id, added=[instance.score],
+                                        removed=[score])
+        else:
+            Title.objects.change_rating(title_id, removed=[score])
+            Title.objects.change_rating(instance.title_id,
+                                        added=[instance.score])
+
+
+@receiver(post_delete, sender=Review)
+def discount_score(sender, instance, **kwargs):
+    """Вычитает оценку удалённого отзыва, в том числе при каскадном
+    удалении автора или произведения."""
+    Title.objects.change_rating(instance.title_id, removed=[instance.score])
+
+
+@receiver(pre_save, sender=Comment)
+def remember_review(sender, instance, raw, **kwargs):
+    stored = None if raw else stored_values(instance, 'review_id')
+    instance.stored_review_id = stored and stored[0]
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw, **kwargs):
+    """Ведёт Review.comments_count при любом сохранении комментария."""
+    if raw:
+        return
+    stored = None if created else instance.stored_review_id
+    if stored == instance.review_id:
+        return
+    if stored is not None:
+        Review.objects.change_comments_count(stored, -1)
+    Review.objects.change_comments_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def discount_comment(sender, instance, **kwargs):
+    """Уменьшает счётчик, в том числе при каскадном удалении автора."""
+    Review.objects.change_comments_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, **kwargs):
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    invalidate_on_commit(user_tag(instance.pk))
@@ -0,0 +1,113 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import SlugRelatedField
+from rest_framework.serializers import BaseSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def split_param(request, name):
+    value = request.query_params.get(name, '')
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def sparse_params(request):
+    """(fields, expand) из запроса или None, если набор полей полный."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    if (FIELDS_PARAM not in request.query_params
+            and EXPAND_PARAM not in request.query_params):
+        return None
+    return split_param(request, FIELDS_PARAM), set(
+        split_param(request, EXPAND_PARAM)
+    )
+
+
+class SparseFieldsetMixin:
+    """Разреженный набор полей для чтения: ?fields=id,name&expand=genre.
+
+    ?fields= оставляет в ответе только перечисленные поля. Когда клиент
+    просит разреженный набор, связи из compact_fields отдаются компактно,
+    slug вместо вложенного объекта, если их нет в ?expand=. Поля из
+    expandable_fields выводятся, только если названы в ?expand=. Без этих
+    параметров ответ не меняется.
+    """
+    compact_fields = {}
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        params = sparse_params(self.context.get('request'))
+        if params is None:
+            return
+        fields, expand = params
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name, make_field in self.compact_fields.items():
+            if name in self.fields and name not in expand:
+                self.fields[name] = make_field()
+        for name, make_field in self.expandable_fields.items():
+            if name in expand and (not fields or name in fields):
+                self.fields[name] = make_field()
+
+
+def related_columns(field, model_field, select_related):
+    """Колонки связанной модели, которые читает поле-связь."""
+    if isinstance(field, BaseSerializer):
+        return serializer_columns(
+            field, model_field.related_model, select_related
+        ) or ()
+    if isinstance(field, SlugRelatedField):
+        return (field.slug_field,)
+    return ()
+
+
+def serializer_columns(serializer, model, select_related):
+    """Колонки модели, которые читает сериализатор, или None.
+
+    Связанные объекты из select_related ограничиваются полями вложенного
+    сериализатора или slug_field. None - поле не сводится к колонкам,
+    и загружать нужно всю строку.
+    """
+    # Связи из select_related нельзя отложить, даже если поле не выводится
+    columns = {model._meta.pk.name, *select_related}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        name = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if model_field.many_to_many or model_field.one_to_many:
+            continue
+        columns.add(name)
+        if model_field.is_relation and name in select_related:
+            columns.update(
+                f'{name}__{column}' for column in related_columns(
+                    field, model_field, select_related[name]
+                )
+            )
+    return columns
+
+
+class SparseQuerysetMixin:
+    """Читает из базы только колонки, нужные разреженному ответу."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if sparse_params(self.request) is None:
+            return queryset
+        select_related = queryset.query.select_related
+        if not isinstance(select_related, dict):
+            select_related = {}
+        columns = serializer_columns(
+            self.get_serializer(), queryset.model, select_related
+        )
+        if columns is None:
+            return queryset
+        return queryset.only(*columns)
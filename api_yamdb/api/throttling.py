@@ -0,0 +1,129 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Ограничение частоты по скользящему окну.
+
+    Частота задаётся как в DRF, например '5/min'. Запросы считаются
+    счётчиками текущего и предыдущего окна длиной в период; предыдущее
+    окно учитывается с весом оставшейся доли периода, поэтому лимит
+    освобождается равномерно, а короткий всплеск до лимита допустим.
+    Счётчик увеличивается атомарным cache.incr до проверки, так что
+    параллельные запросы одного клиента не проходят сверх лимита.
+    Счётчики хранятся в кэше THROTTLE_CACHE_ALIAS: locmem ограничивает
+    каждый процесс отдельно, общий кэш (memcached) - все процессы вместе.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_cache_keys(self, request, view):
+        key = self.get_cache_key(request, view)
+        return [] if key is None else [key]
+
+    def get_cost(self, request, view):
+        """Сколько единиц лимита расходует запрос."""
+        return 1
+
+    def increment(self, key, delta=1):
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            # Окна ещё нет: add создаёт его только у первого из запросов
+            self.cache.add(key, 0, self.duration * 2)
+            return self.cache.incr(key, delta)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        position = self.timer() / self.duration
+        window = int(position)
+        remaining = 1 - (position - window)
+        cost = self.get_cost(request, view)
+        counted = []
+        for key in self.get_cache_keys(request, view):
+            current = f'{key}:{window}'
+            count = self.increment(current, cost)
+            counted.append(current)
+            previous = self.cache.get(f'{key}:{window - 1}', 0)
+            if count + previous * remaining > self.num_requests:
+                # Отклонённые запросы лимит не расходуют
+                for counter in counted:
+                    self.increment(counter, -cost)
+                self.wait_time = self.duration * remaining
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthIPThrottle(SlidingWindowThrottle):
+    """Запросы к эндпоинтам аутентификации с одного адреса."""
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class AuthIdentityThrottle(SlidingWindowThrottle):
+    """Попытки для одного username и одного email с любых адресов."""
+    scope = 'auth_identity'
+    fields = ('username', 'email')
+
+    def get_cache_keys(self, request, view):
+        keys = []
+        for field in self.fields:
+            value = request.data.get(field)
+            if isinstance(value, str) and value.strip():
+                # Хэш: в ключах memcached нельзя пробелы и длинные строки
+                ident = f'{field}:{value.strip().lower()}'
+                keys.append(self.cache_format % {
+                    'scope': self.scope,
+                    'ident': md5(ident.encode()).hexdigest(),
+                })
+        return keys
+
+
+class ScopedWriteThrottle(SlidingWindowThrottle):
+    """Ограничивает изменяющие запросы по view.throttle_scope.
+
+    Чтение не ограничивается; ключ - пользователь или адрес анонима.
+    Пакетное представление задаёт get_throttle_cost(request), чтобы
+    каждый элемент пакета расходовал лимит как отдельный запрос.
+    """
+
+    def __init__(self):
+        # Частота известна только в allow_request, когда есть view
+        pass
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cost(self, request, view):
+        get_throttle_cost = getattr(view, 'get_throttle_cost', None)
+        if get_throttle_cost is None:
+            return 1
+        return get_throttle_cost(request)
+
+    def get_cache_key(self, request, view):
+        if request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
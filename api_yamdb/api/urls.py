@@ -1,8 +1,10 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from .views import (APISignUpViewSet, CategoryViewSet, CommentViewSet,
-                    CustomTokenObtainPairViewSet, GenreViewSet, ReviewViewSet,
+from .views import (APISignUpViewSet, CacheStatsView, CategoryViewSet,
+                    CommentBatchViewSet, CommentViewSet,
+                    CustomTokenObtainPairViewSet, ExportView, GenreViewSet,
+                    MetricsView, ReviewBatchViewSet, ReviewViewSet,
                     TitleViewSet, UserViewSet)
 
 v1_router = DefaultRouter()
@@ -15,6 +17,10 @@ v1_router.register(
     r'v1/titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet, basename='comments')
 v1_router.register(r'v1/users', UserViewSet, basename='users')
+v1_router.register(r'v1/batch/reviews', ReviewBatchViewSet,
+                   basename='reviews-batch')
+v1_router.register(r'v1/batch/comments', CommentBatchViewSet,
+                   basename='comments-batch')
 
 auth_patterns = [
     path('signup/', APISignUpViewSet.as_view()),
@@ -23,4 +29,7 @@ auth_patterns = [
 urlpatterns = [
     path('', include(v1_router.urls)),
     path('v1/auth/', include(auth_patterns)),
+    path('v1/cache/stats/', CacheStatsView.as_view()),
+    path('v1/metrics/', MetricsView.as_view()),
+    re_path(r'^v1/export/(?P<kind>review|comment)s/$', ExportView.as_view()),
 ]
@@ -0,0 +1,11 @@
+def normalize_query(query_params):
+    """Параметры запроса без пустых значений и в стабильном порядке."""
+    items = sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        for value in values
+        if value != ''
+    )
+    if ('page', '1') in items:
+        items.remove(('page', '1'))
+    return '&'.join(f'{key}={value}' for key, value in items)
@@ -1,29 +1,87 @@
+from collections import defaultdict
+
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, connection, transaction
+from django.db.models import AutoField
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
+from jobs.queue import enqueue
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenViewBase
-from reviews.models import Category, Genre, Review, Title
+from reviews import export
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRanking)
 from users.models import User
 
-from .filters import TitleFilter
-from .permissions import (IsAdminModeratorOwnerOrReadOnly, IsAdminOrReadOnly,
-                          IsAdminOrSuperuser)
-from .serializers import (APITokenObtainSerializer, CategorySerializer,
-                          CommentSerializer, GenreSerializer, ReviewSerializer,
+from .cache import (CachedListMixin, CachedRetrieveMixin, cached_response,
+                    get_stats, get_tag_versions, invalidate)
+from .conditional import ConditionalMixin, make_etag
+from .fast import FastListMixin
+from .filters import TitleFilter, TitleSearchFilter
+from .nested import NestedParentMixin
+from .perf import render_metrics
+from .permissions import (IsAdminModeratorOwnerOrReadOnly, IsAdminOrModerator,
+                          IsAdminOrReadOnly, IsAdminOrSuperuser)
+from .search import get_search_backend
+from .serializers import (REVIEW_EXISTS, APITokenObtainSerializer,
+                          BatchDeleteSerializer, BatchSerializer,
+                          CategorySerializer, CommentSerializer,
+                          GenreSerializer, ReviewBatchSerializer,
+                          ReviewSerializer, TitleBatchSerializer,
                           TitleListSerializer, TitlePostSerializer,
+                          TitleRankingSerializer, TitleStatsSerializer,
                           UserSerializer, UserSerializerSignUp)
+from .sparse import SparseQuerysetMixin, sparse_params
+from .throttling import (AuthIdentityThrottle, AuthIPThrottle,
+                         ScopedWriteThrottle)
+
+
+def get_batch_items(request):
+    serializer = BatchSerializer(data={'items': request.data})
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data['items']
+
+
+def get_batch_ids(request):
+    serializer = BatchDeleteSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return list(dict.fromkeys(serializer.validated_data['ids']))
+
+
+def item_error(index, errors, code=status.HTTP_400_BAD_REQUEST):
+    return {'index': index, 'status': code, 'errors': errors}
+
 
+def bulk_create(model, objects):
+    """bulk_create, гарантирующий заполненные pk у созданных объектов.
 
-class CategoryViewSet(mixins.CreateModelMixin,
+    Как и bulk_create, не отправляет сигналы сохранения: рейтинг, поиск
+    и кэш пакетные представления обновляют сами, одним запросом на
+    группу объектов.
+    """
+    if connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objects)
+    fields = [field for field in model._meta.local_concrete_fields
+              if not isinstance(field, AutoField)]
+    for instance in objects:
+        instance.pk = model._base_manager._insert(
+            [instance], fields=fields, return_id=True
+        )
+        instance._state.adding = False
+        instance._state.db = connection.alias
+    return objects
+
+
+class CategoryViewSet(SparseQuerysetMixin, CachedListMixin,
+                      mixins.CreateModelMixin,
                       mixins.DestroyModelMixin,
                       mixins.ListModelMixin,
                       viewsets.GenericViewSet):
@@ -33,9 +91,11 @@ class CategoryViewSet(mixins.CreateModelMixin,
     filter_backends = (filters.SearchFilter,)
     search_fields = ("name",)
     lookup_field = "slug"
+    cache_tags = ("categories",)
 
 
-class GenreViewSet(mixins.CreateModelMixin,
+class GenreViewSet(SparseQuerysetMixin, CachedListMixin,
+                   mixins.CreateModelMixin,
                    mixins.ListModelMixin,
                    mixins.DestroyModelMixin,
                    viewsets.GenericViewSet):
@@ -45,69 +105,467 @@ class GenreViewSet(mixins.CreateModelMixin,
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_tags = ('genres',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(
-        rating=Avg("review__score"),
-    ).order_by("name")
+class TitleViewSet(SparseQuerysetMixin, CachedListMixin, CachedRetrieveMixin,
+                   FastListMixin, ConditionalMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        "category"
+    ).prefetch_related("genre").order_by("name")
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, TitleSearchFilter]
     filterset_class = TitleFilter
+    cache_tags = ("titles", "titles-list")
+    cache_detail_tag = "title:{pk}"
+    ranking_cache_tags = ("titles", "titles-list", "rankings")
+
+    @property
+    def keyset_ordering(self):
+        """Результаты поиска упорядочены по релевантности, а не по
+        (name, id), поэтому листаются только номерами страниц: курсор
+        по названию вернул бы их по алфавиту."""
+        search = self.request.query_params.get(
+            TitleSearchFilter.search_param, ''
+        )
+        return None if search.strip() else ("name", "id")
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleListSerializer
         return TitlePostSerializer
 
+    def ranking(self, request, kind):
+        """Позиции из таблицы, которую строит manage.py refresh_rankings."""
+        queryset = TitleRanking.objects.filter(kind=kind).select_related(
+            'title__category'
+        ).prefetch_related('title__genre')
+        genre = request.query_params.get('genre')
+        category = request.query_params.get('category')
+        if genre:
+            queryset = queryset.filter(genre__slug=genre)
+        elif category:
+            queryset = queryset.filter(category__slug=category)
+        else:
+            queryset = queryset.filter(genre=None, category=None)
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.RANKING_SIZE
+            ))
+        except ValueError:
+            raise ValidationError({'limit': ['Ожидается целое число']})
+        limit = min(max(limit, 1), settings.RANKING_SIZE)
+        serializer = TitleRankingSerializer(queryset[:limit], many=True)
+        return Response(serializer.data)
+
+    def title_stats(self, request, pk):
+        title = get_object_or_404(
+            Title.objects.only(*TitleStatsSerializer.model_fields), pk=pk
+        )
+        return Response(TitleStatsSerializer(title).data)
+
+    def titles_stats(self, request):
+        try:
+            ids = [int(pk) for pk in
+                   request.query_params.get('ids', '').split(',') if pk]
+        except ValueError:
+            raise ValidationError({'ids': ['Ожидаются id через запятую']})
+        if not ids or len(ids) > settings.BATCH_MAX_SIZE:
+            raise ValidationError({'ids': [
+                f'Укажите от 1 до {settings.BATCH_MAX_SIZE} id'
+            ]})
+        titles = Title.objects.filter(pk__in=ids).only(
+            *TitleStatsSerializer.model_fields
+        ).order_by('pk')
+        return Response(TitleStatsSerializer(titles, many=True).data)
+
+    @action(detail=True, url_path='stats')
+    def stats(self, request, pk=None):
+        """Распределение оценок; счётчики ведутся при записи отзывов."""
+        tags = (self.cache_tags[0], self.cache_detail_tag.format(pk=pk))
+        return cached_response(self, self.title_stats, tags, request, pk)
+
+    @action(detail=False, url_path='stats')
+    def stats_batch(self, request):
+        """Распределение оценок для ?ids=1,2,3 одним запросом."""
+        return cached_response(self, self.titles_stats, self.cache_tags,
+                               request)
+
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        return cached_response(self, self.ranking, self.ranking_cache_tags,
+                               request, TitleRanking.TOP)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(detail=False, url_path='trending')
+    def trending(self, request):
+        return cached_response(self, self.ranking, self.ranking_cache_tags,
+                               request, TitleRanking.TRENDING)
+
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """Создаёт произведения из массива в одной транзакции."""
+        items = get_batch_items(request)
+        categories = dict(Category.objects.values_list('slug', 'pk'))
+        genres = dict(Genre.objects.values_list('slug', 'pk'))
+        results = [None] * len(items)
+        titles, title_genres = [], []
+        for index, item in enumerate(items):
+            serializer = TitleBatchSerializer(data=item)
+            if not serializer.is_valid():
+                results[index] = item_error(index, serializer.errors)
+                continue
+            data = serializer.validated_data
+            slugs = data.pop('genre')
+            category = data.pop('category')
+            errors = {}
+            if category not in categories:
+                errors['category'] = [f'Категория «{category}» не найдена']
+            missing = [slug for slug in slugs if slug not in genres]
+            if missing:
+                errors['genre'] = [f'Жанр «{slug}» не найден'
+                                   for slug in missing]
+            if errors:
+                results[index] = item_error(index, errors)
+                continue
+            titles.append((index, Title(
+                category_id=categories[category], **data
+            )))
+            title_genres.append([genres[slug] for slug in slugs])
+
+        with transaction.atomic():
+            bulk_create(Title, [title for _, title in titles])
+            Title.genre.through.objects.bulk_create([
+                Title.genre.through(title_id=title.pk, genre_id=genre_id)
+                for (_, title), genre_ids in zip(titles, title_genres)
+                for genre_id in genre_ids
+            ])
+        get_search_backend().index([title for _, title in titles])
+        invalidate('titles-list')
+        for index, title in titles:
+            results[index] = {'index': index,
+                              'status': status.HTTP_201_CREATED,
+                              'id': title.pk}
+        return Response(results, status=status.HTTP_200_OK)
+
+    def get_object_etag(self, instance):
+        category = instance.category
+        return make_etag(
+            super().get_object_etag(instance),
+            category and (category.slug, category.name),
+            [(genre.slug, genre.name) for genre in instance.genre.all()],
+        )
+
+    def get_list_etag(self, queryset):
+        return make_etag(super().get_list_etag(queryset),
+                         get_tag_versions(self.cache_tags))
+
+
+class ReviewViewSet(SparseQuerysetMixin, FastListMixin, NestedParentMixin,
+                    ConditionalMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAdminModeratorOwnerOrReadOnly]
+    throttle_classes = [ScopedWriteThrottle]
+    throttle_scope = 'reviews'
+    keyset_ordering = ("-pub_date", "-id")
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
+    child_lookups = {'title_id': 'title_id'}
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
-        return Review.objects.filter(title=title)
+        queryset = super().get_queryset().select_related("author")
+        params = sparse_params(self.request)
+        if params is None or 'latest_comments' not in params[1]:
+            return queryset
+        return queryset.with_latest_comments(settings.REVIEW_LATEST_COMMENTS)
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-        serializer.save(author=self.request.user, title=title)
+        title = self.get_parent()
+        # Повторный отзыв отклоняет ограничение unique_review_author,
+        # без предварительного запроса на каждое создание
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=self.request.user, title=title
+            ).exists():
+                raise
+            raise ValidationError({'non_field_errors': [REVIEW_EXISTS]})
+
+    def perform_update(self, serializer):
+        # Рейтинг меняют сигналы отзыва; в транзакции они читают прежнюю
+        # оценку под блокировкой строки
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Параллельное удаление того же отзыва ждёт блокировку и не
+            # вычитает оценку второй раз
+            if Review.objects.select_for_update().filter(
+                pk=instance.pk
+            ).exists():
+                instance.delete()
+
+
+class ReviewBatchViewSet(viewsets.ViewSet):
+    """Пакетное создание и удаление отзывов с результатом по элементам.
 
+    Лимит 'reviews' общий с ReviewViewSet, каждый элемент пакета
+    расходует его как отдельный запрос; пакет больше лимита отклоняется.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedWriteThrottle]
+    throttle_scope = 'reviews'
 
-class CommentViewSet(viewsets.ModelViewSet):
+    def get_throttle_cost(self, request):
+        items = request.data
+        if self.action == 'bulk_delete' and isinstance(items, dict):
+            items = items.get('ids')
+        # Неверное тело отклонит валидация пакета
+        return len(items) if isinstance(items, list) and items else 1
+
+    def create(self, request):
+        items = get_batch_items(request)
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = ReviewBatchSerializer(
+                data=item, context={'request': request}
+            )
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = item_error(index, serializer.errors)
+
+        title_ids = {data['title'] for _, data in valid}
+        existing_titles = set(Title.objects.filter(
+            pk__in=title_ids
+        ).values_list('pk', flat=True))
+        reviewed = set(Review.objects.filter(
+            author=request.user, title__in=title_ids
+        ).values_list('title_id', flat=True))
+        reviews = []
+        for index, data in valid:
+            if data['title'] not in existing_titles:
+                results[index] = item_error(
+                    index, {'title': ['Произведение не найдено']},
+                    status.HTTP_404_NOT_FOUND
+                )
+            elif data['title'] in reviewed:
+                results[index] = item_error(index, {
+                    'non_field_errors': [REVIEW_EXISTS]
+                })
+            else:
+                reviewed.add(data['title'])
+                title_id = data.pop('title')
+                reviews.append((index, Review(
+                    author=request.user, title_id=title_id, **data
+                )))
+
+        try:
+            self.insert(reviews)
+        except IntegrityError:
+            # Параллельный запрос успел создать отзыв на одно из
+            # произведений: пакет сохраняется по одному, и ошибку
+            # получает только этот элемент
+            reviews = self.insert_each(reviews, results)
+        invalidate('titles-list',
+                   *{f'title:{review.title_id}' for _, review in reviews})
+        for index, review in reviews:
+            results[index] = {'index': index,
+                              'status': status.HTTP_201_CREATED,
+                              'id': review.pk}
+        return Response(results, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def insert(reviews):
+        scores = defaultdict(list)
+        for _, review in reviews:
+            scores[review.title_id].append(review.score)
+        with transaction.atomic():
+            bulk_create(Review, [review for _, review in reviews])
+            for title_id in sorted(scores):
+                Title.objects.change_rating(title_id, added=scores[title_id])
+
+    def insert_each(self, reviews, results):
+        created = []
+        for index, review in reviews:
+            # pk мог остаться от отменённой вставки пакета
+            review.pk = None
+            review._state.adding = True
+            try:
+                self.insert([(index, review)])
+            except IntegrityError:
+                if not Review.objects.filter(
+                    author_id=review.author_id, title_id=review.title_id
+                ).exists():
+                    raise
+                results[index] = item_error(index, {
+                    'non_field_errors': [REVIEW_EXISTS]
+                })
+            else:
+                created.append((index, review))
+        return created
+
+    @action(detail=False, methods=['post'], url_path='delete')
+    def bulk_delete(self, request):
+        ids = get_batch_ids(request)
+        user = request.user
+        results, allowed = [], []
+        with transaction.atomic():
+            # Блокировка строк не даёт параллельному удалению вычесть
+            # те же оценки из рейтинга ещё раз
+            reviews = Review.objects.select_for_update().in_bulk(ids)
+            for index, pk in enumerate(ids):
+                review = reviews.get(pk)
+                if review is None:
+                    results.append(item_error(
+                        index, 'Отзыв не найден', status.HTTP_404_NOT_FOUND
+                    ))
+                elif (review.author_id != user.pk and not user.is_admin
+                        and not user.is_moderator
+                        and not user.is_superuser):
+                    results.append(item_error(
+                        index, 'Недостаточно прав', status.HTTP_403_FORBIDDEN
+                    ))
+                else:
+                    allowed.append(review)
+                    results.append({'index': index, 'id': pk,
+                                    'status': status.HTTP_204_NO_CONTENT})
+            # Оценки вычитают сигналы удаления отзывов
+            Review.objects.filter(
+                pk__in=[review.pk for review in allowed]
+            ).delete()
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class CommentBatchViewSet(viewsets.ViewSet):
+    """Пакетное удаление комментариев модераторами."""
+    permission_classes = [IsAdminOrModerator]
+
+    @action(detail=False, methods=['post'], url_path='delete')
+    def bulk_delete(self, request):
+        ids = get_batch_ids(request)
+        with transaction.atomic():
+            # Блокировка строк не даёт параллельному удалению уменьшить
+            # счётчики второй раз; счётчики меняют сигналы удаления
+            existing = set(Comment.objects.select_for_update().filter(
+                pk__in=ids
+            ).values_list('pk', flat=True))
+            Comment.objects.filter(pk__in=existing).delete()
+        results = [
+            {'index': index, 'id': pk, 'status': status.HTTP_204_NO_CONTENT}
+            if pk in existing else
+            item_error(index, 'Комментарий не найден',
+                       status.HTTP_404_NOT_FOUND)
+            for index, pk in enumerate(ids)
+        ]
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class CommentViewSet(SparseQuerysetMixin, FastListMixin, NestedParentMixin,
+                     ConditionalMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAdminModeratorOwnerOrReadOnly]
+    throttle_classes = [ScopedWriteThrottle]
+    throttle_scope = 'comments'
+    keyset_ordering = ("-pub_date", "-id")
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    child_lookups = {'review_id': 'review_id',
+                     'review__title_id': 'title_id'}
 
     def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get("review_id"),
-            title=self.kwargs.get("title_id")
-        )
-        return review.comments.all()
+        return super().get_queryset().select_related("author")
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get("title_id")
-        review_id = self.kwargs.get("review_id")
-        review = get_object_or_404(Review, id=review_id, title=title_id)
-        serializer.save(author=self.request.user, review=review)
+        review = self.get_parent()
+        # Счётчик комментариев отзыва меняют сигналы в той же транзакции
+        with transaction.atomic():
+            serializer.save(author=self.request.user, review=review)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Параллельное удаление того же комментария ждёт блокировку
+            # и не уменьшает счётчик второй раз
+            if Comment.objects.select_for_update().filter(
+                pk=instance.pk
+            ).exists():
+                instance.delete()
+
+
+class MetricsView(APIView):
+    """Замеры запросов по маршрутам для Prometheus."""
+    permission_classes = [IsAdminOrSuperuser]
+
+    def get(self, request):
+        return HttpResponse(render_metrics(),
+                            content_type='text/plain; version=0.0.4')
+
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminOrSuperuser]
+
+    def get(self, request):
+        stats = get_stats((CategoryViewSet.cache_tags[0],
+                           GenreViewSet.cache_tags[0],
+                           TitleViewSet.cache_tags[0]))
+        return Response(stats, status=status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка отзывов и комментариев для аналитики."""
+    permission_classes = [IsAdminOrSuperuser]
+    chunk_size = 2000
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, kind):
+        file_format = request.query_params.get('type', 'ndjson')
+        if file_format not in export.FORMATS:
+            raise ValidationError(
+                {'type': f'Допустимые форматы: {", ".join(export.FORMATS)}'}
+            )
+        since = request.query_params.get('since')
+        if since is not None:
+            since = export.parse_since(since)
+            if since is None:
+                raise ValidationError({'since': 'Неверный формат даты'})
+        compress = request.query_params.get('gzip') in ('1', 'true')
+
+        rows = export.export_rows(kind, since, self.chunk_size)
+        filename = f'{kind}s.{file_format}'
+        content_type = export.CONTENT_TYPES[file_format]
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(
+            export.encode(export.render(kind, rows, file_format), compress),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
 
 
 class CustomTokenObtainPairViewSet(TokenViewBase):
     serializer_class = APITokenObtainSerializer
+    throttle_classes = [AuthIPThrottle, AuthIdentityThrottle]
 
 
 class APISignUpViewSet(APIView):
     serializer_class = UserSerializerSignUp
+    throttle_classes = [AuthIPThrottle, AuthIdentityThrottle]
 
     def send_code(self, user, email):
         token = default_token_generator.make_token(user)
-        send_mail(
-            'res',
-            token,
-            settings.ADDR_SENT_EMAIL,
-            [email]
+        enqueue(
+            'send_mail',
+            subject='res',
+            body=token,
+            from_email=settings.ADDR_SENT_EMAIL,
+            to=[email],
         )
 
     def post(self, request):
@@ -131,7 +589,7 @@ class APISignUpViewSet(APIView):
         return Response(response, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     lookup_field = 'username'
@@ -145,11 +603,13 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def get(self, request):
+        # request.user - снимок из кэша аутентификации, профиль читаем целиком
+        user = User.objects.get(pk=request.user.pk)
         if request.method == 'GET':
-            serializer = UserSerializer(request.user, many=False)
+            serializer = UserSerializer(user, many=False)
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer = UserSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
@@ -160,7 +620,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 and request.user.is_user
                 and role is not None
         ):
-            serializer = UserSerializer(request.user, many=False)
+            serializer = UserSerializer(user, many=False)
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
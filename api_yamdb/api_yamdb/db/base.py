@@ -0,0 +1,104 @@
+"""PostgreSQL с проверкой постоянных соединений и пулом в процессе.
+
+Подключается через DB_ENGINE=api_yamdb.db, параметры задаются ключами
+DATABASES:
+
+HEALTH_CHECKS
+    перед первым запросом в рамках HTTP-запроса переиспользуемое
+    соединение проверяется SELECT 1 и при разрыве открывается заново;
+POOL_SIZE
+    если больше нуля, соединения берутся из общего пула процесса
+    psycopg2 ThreadedConnectionPool и возвращаются в него вместо закрытия.
+    Пул полезен для воркеров с потоками (gthread, uvicorn) и требует
+    CONN_MAX_AGE=0: соединение возвращается в пул в конце каждого запроса,
+    иначе каждый поток держит своё и пул исчерпывается;
+POOL_TIMEOUT
+    сколько секунд ждать свободное соединение, если пул исчерпан.
+"""
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from psycopg2 import OperationalError
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, size, conn_params):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ThreadedConnectionPool(size, size, **conn_params)
+        return _pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        self.health_checks = settings_dict.get('HEALTH_CHECKS', True)
+        self.pool_size = settings_dict.get('POOL_SIZE', 0)
+        self.pool_timeout = settings_dict.get('POOL_TIMEOUT', 5)
+        self.health_check_done = False
+        conn_max_age = settings_dict.get('CONN_MAX_AGE', 0)
+        if self.pool_size and conn_max_age != 0:
+            raise ImproperlyConfigured(
+                f'{self.alias}: POOL_SIZE требует CONN_MAX_AGE=0, '
+                f'задано {conn_max_age}'
+            )
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_size:
+            self.health_check_done = True
+            return super().get_new_connection(conn_params)
+        pool = get_pool(self.alias, self.pool_size, conn_params)
+        deadline = time.monotonic() + self.pool_timeout
+        while True:
+            try:
+                connection = pool.getconn()
+                break
+            except PoolError:
+                if time.monotonic() > deadline:
+                    raise OperationalError(
+                        f'Пул соединений {self.alias} исчерпан'
+                    )
+                time.sleep(0.01)
+        # Соединение из пула могло оборваться, пока лежало без дела
+        self.health_check_done = False
+        isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level'
+        )
+        if isolation_level is None:
+            self.isolation_level = connection.isolation_level
+        else:
+            self.isolation_level = isolation_level
+            if connection.isolation_level != isolation_level:
+                connection.set_session(isolation_level=isolation_level)
+        return connection
+
+    def _close(self):
+        if not self.pool_size or self.connection is None:
+            super()._close()
+            return
+        with self.wrap_database_errors:
+            _pools[self.alias].putconn(
+                self.connection, close=bool(self.connection.closed)
+            )
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or not self.health_checks
+                or self.health_check_done or self.in_atomic_block):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,150 @@
+"""Чтение с реплик базы для безопасных HTTP-запросов.
+
+Реплики перечисляются в REPLICA_DATABASES, см. DB_REPLICAS в settings.py.
+ReplicaMiddleware выбирает для GET, HEAD и OPTIONS одну реплику на весь
+запрос, и ReplicaRouter направляет на неё чтение; запись, транзакции
+изменяющих запросов, команды manage.py и фоновые задачи всегда работают
+с default.
+
+После изменяющего запроса клиент на REPLICA_PIN_SECONDS закрепляется за
+default, чтобы сразу увидеть свою запись. Клиент определяется по
+заголовку Authorization, а без него - по адресу, как в ограничениях
+частоты: из X-Forwarded-For с учётом NUM_PROXIES, а не по адресу nginx,
+общему для всех анонимов. Метки хранятся в кэше API_CACHE_ALIAS,
+поэтому между процессами закрепление работает только с общим кэшем.
+
+Реплика, к которой не удалось подключиться или которая отстаёт больше
+REPLICA_MAX_LAG секунд, не используется до следующей проверки через
+REPLICA_CHECK_INTERVAL секунд; если исправных реплик нет, чтение идёт
+с default.
+
+Общие кэши - ответы API и снимки пользователей - заполняются только
+внутри read_from_default: данные отстающей реплики иначе раздавались бы
+всем клиентам до следующей инвалидации.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.throttling import BaseThrottle
+
+PIN_KEY_PREFIX = 'replica:pin'
+
+# Отставание PostgreSQL-реплики в секундах; 0, если всё полученное
+# уже применено, и NULL на основном сервере
+LAG_SQL = '''
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+_health = {}
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах; None, если его не измерить."""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor != 'postgresql':
+                cursor.execute('SELECT 1')
+                return None
+            cursor.execute(LAG_SQL)
+            return cursor.fetchone()[0]
+    except DatabaseError:
+        # Следующая проверка откроет соединение заново
+        connection.close()
+        raise
+
+
+def is_healthy(alias):
+    """Результат последней проверки реплики, не старше интервала."""
+    now = time.monotonic()
+    checked, healthy = _health.get(alias, (None, False))
+    if checked is not None and now - checked < settings.REPLICA_CHECK_INTERVAL:
+        return healthy
+    try:
+        lag = replica_lag(alias)
+    except DatabaseError:
+        healthy = False
+    else:
+        healthy = lag is None or lag <= settings.REPLICA_MAX_LAG
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+def choose_replica():
+    """Случайная исправная реплика или None."""
+    replicas = [alias for alias in settings.REPLICA_DATABASES
+                if is_healthy(alias)]
+    return random.choice(replicas) if replicas else None
+
+
+@contextmanager
+def read_from_default():
+    """Чтение с default внутри блока, даже если запрос выбрал реплику."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def pin_key(request):
+    ident = (request.META.get('HTTP_AUTHORIZATION')
+             or BaseThrottle().get_ident(request) or '')
+    return f'{PIN_KEY_PREFIX}:{md5(ident.encode()).hexdigest()}'
+
+
+class ReplicaMiddleware:
+    """Выбирает реплику для безопасного запроса и закрепляет за default
+    клиентов после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+        cache = caches[settings.API_CACHE_ALIAS]
+        key = pin_key(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            # Окно отсчитывается от конца записи, даже неудачной
+            try:
+                return self.get_response(request)
+            finally:
+                cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        alias = None if cache.get(key) else choose_replica()
+        token = _read_alias.set(alias)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Чтение - с реплики, выбранной ReplicaMiddleware, остальное -
+    с default."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии default, объекты из них связываются свободно
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -16,16 +16,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'rest_framework_simplejwt',
-    'api',
+    'api.apps.ApiConfig',
     'reviews',
     'users',
+    'jobs.apps.JobsConfig',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'api.compression.CompressionMiddleware',
+    'api.perf.PerfMiddleware',
+    'api_yamdb.db.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,10 +70,136 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Постоянные соединения; 0 - закрывать после каждого запроса.
+        # С пулом (DB_POOL_SIZE) допустим только 0: соединение возвращается
+        # в пул в конце запроса
+        'CONN_MAX_AGE': int(os.getenv(
+            'DB_CONN_MAX_AGE',
+            default=0 if int(os.getenv('DB_POOL_SIZE', default=0)) else 60
+        )),
+        # Режим внешнего пулера (pgbouncer в режиме transaction):
+        # серверные курсоры не переживают смену соединения между запросами
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_EXTERNAL_POOLER', default='') == '1'
+        ),
+        # Используются движком api_yamdb.db, см. api_yamdb/db/base.py
+        'HEALTH_CHECKS': os.getenv('DB_HEALTH_CHECKS', default='1') == '1',
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', default=0)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=5)),
     }
 }
 
+# Реплики для чтения, см. api_yamdb/db/replicas.py: через запятую адреса
+# host[:port] для PostgreSQL или пути к файлам для SQLite. Остальные
+# параметры подключения берутся из default.
+REPLICA_DATABASES = []
+for number, address in enumerate(filter(None, os.getenv(
+    'DB_REPLICAS', default=''
+).split(','))):
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        replica = {'NAME': address}
+    else:
+        host, _, port = address.partition(':')
+        replica = {'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'], **replica, 'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['api_yamdb.db.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=5))
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', default=5))
+REPLICA_CHECK_INTERVAL = float(
+    os.getenv('REPLICA_CHECK_INTERVAL', default=5)
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+# locmem у каждого процесса свой: инвалидация в одном воркере не видна
+# остальным, см. gunicorn.conf.py
+CACHE_IS_LOCAL = CACHES['default']['BACKEND'].endswith('.LocMemCache')
+
+# Счётчики /api/v1/metrics/ (около 17 ключей на маршрут) отдельно от
+# default: иначе они вытесняют версии тегов, окна ограничений и снимки
+# пользователей. Для locmem это отдельное хранилище со своим лимитом,
+# для memcached - свой префикс ключей или METRICS_CACHE_LOCATION.
+CACHES['metrics'] = {
+    'BACKEND': CACHES['default']['BACKEND'],
+    'LOCATION': os.getenv(
+        'METRICS_CACHE_LOCATION',
+        default='metrics' if CACHE_IS_LOCAL else CACHES['default']['LOCATION']
+    ),
+    'KEY_PREFIX': 'metrics',
+    'TIMEOUT': None,
+}
+if CACHE_IS_LOCAL:
+    CACHES['metrics']['OPTIONS'] = {'MAX_ENTRIES': 5000}
+PERF_CACHE_ALIAS = 'metrics'
+
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+# Снимок пользователя в кэше процесса живёт секунды: смена роли или
+# блокировка в другом процессе не сдвигает его версию
+USER_CACHE_TIMEOUT = int(os.getenv(
+    'USER_CACHE_TIMEOUT', default=5 if CACHE_IS_LOCAL else 3600
+))
+
+TITLE_SEARCH_CONFIG = os.getenv('TITLE_SEARCH_CONFIG', default='simple')
+
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', default=1000))
+
+# Списки произведений, отзывов и комментариев собираются из .values()
+# без ModelSerializer, см. api/fast.py
+API_FAST_SERIALIZERS = os.getenv('API_FAST_SERIALIZERS', default='1') == '1'
+
+# Сколько последних комментариев в превью ?expand=latest_comments
+REVIEW_LATEST_COMMENTS = int(os.getenv('REVIEW_LATEST_COMMENTS', default=3))
+
+# Сжатие ответов, см. api/compression.py
+COMPRESSION_ENCODINGS = os.getenv(
+    'COMPRESSION_ENCODINGS', default='br,gzip'
+).split(',')
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', default=6))
+COMPRESSION_BR_QUALITY = int(os.getenv('COMPRESSION_BR_QUALITY', default=4))
+
+# Замеры запросов, см. api/perf.py. Server-Timing раскрывает клиентам
+# время базы и число запросов, поэтому включается явно.
+PERF_METRICS = os.getenv('PERF_METRICS', default='1') == '1'
+PERF_SERVER_TIMING = os.getenv('PERF_SERVER_TIMING', default='') == '1'
+PERF_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Рейтинги произведений, см. manage.py refresh_rankings
+RANKING_SIZE = int(os.getenv('RANKING_SIZE', default=100))
+RANKING_MIN_REVIEWS = int(os.getenv('RANKING_MIN_REVIEWS', default=3))
+RANKING_TRENDING_DAYS = int(os.getenv('RANKING_TRENDING_DAYS', default=7))
+RANKING_TRENDING_MIN_REVIEWS = int(
+    os.getenv('RANKING_TRENDING_MIN_REVIEWS', default=1)
+)
+
+# Очередь фоновых задач: manage.py run_worker. В режиме JOBS_EAGER задачи
+# выполняются сразу в процессе запроса.
+JOBS_EAGER = os.getenv('JOBS_EAGER', default='') == '1'
+JOBS_BATCH_SIZE = int(os.getenv('JOBS_BATCH_SIZE', default=100))
+JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', default=1))
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', default=5))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', default=30))
+JOBS_LOCK_TIMEOUT = int(os.getenv('JOBS_LOCK_TIMEOUT', default=600))
+# Выполненные задачи хранятся столько дней, затем их удаляет run_worker
+JOBS_DONE_RETENTION_DAYS = int(
+    os.getenv('JOBS_DONE_RETENTION_DAYS', default=7)
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,13 +237,32 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 
-    'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
     'PAGE_SIZE': 30,
+
+    # Адрес клиента берётся из X-Forwarded-For, который выставляет nginx
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('THROTTLE_AUTH_IP', default='20/min'),
+        'auth_identity': os.getenv('THROTTLE_AUTH_IDENTITY', default='5/min'),
+        'reviews': os.getenv('THROTTLE_REVIEWS', default='30/min'),
+        'comments': os.getenv('THROTTLE_COMMENTS', default='60/min'),
+    },
 }
+THROTTLE_CACHE_ALIAS = os.getenv('THROTTLE_CACHE_ALIAS', default='default')
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
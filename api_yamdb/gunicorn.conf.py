@@ -0,0 +1,38 @@
+"""Настройки gunicorn, режим запуска выбирается переменными окружения.
+
+WSGI (по умолчанию) - синхронные воркеры:
+    GUNICORN_WORKER_CLASS=sync
+WSGI с потоками - медленный клиент занимает поток, а не процесс:
+    GUNICORN_WORKER_CLASS=gthread GUNICORN_THREADS=8
+ASGI - сокеты обслуживает цикл событий uvicorn:
+    GUNICORN_APP=api_yamdb.asgi:application
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+
+Несколько процессов требуют общего кэша (CACHE_BACKEND, например
+memcached из infra/docker-compose.yaml): инвалидация ответов и снимков
+пользователей, счётчики ограничений и метрики живут в кэше. С locmem по
+умолчанию запускается один воркер, а GUNICORN_WORKERS больше одного
+останавливает запуск.
+"""
+import multiprocessing
+import os
+
+SHARED_CACHE = not os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+).endswith('.LocMemCache')
+
+wsgi_app = os.getenv('GUNICORN_APP', 'api_yamdb.wsgi:application')
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS',
+    multiprocessing.cpu_count() * 2 + 1 if SHARED_CACHE else 1
+))
+if workers > 1 and not SHARED_CACHE:
+    raise RuntimeError(
+        f'GUNICORN_WORKERS={workers} требует общего кэша: задайте '
+        'CACHE_BACKEND и CACHE_LOCATION, например memcached'
+    )
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
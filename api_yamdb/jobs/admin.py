@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('name', 'status')
+    readonly_fields = ('locked_at', 'last_error', 'created')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
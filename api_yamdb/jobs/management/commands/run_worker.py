@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from jobs.queue import purge_done, run_pending
+
+# Как часто простаивающий воркер чистит выполненные задачи, секунды
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.JOBS_BATCH_SIZE,
+            help='Сколько задач забирать за один проход',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        purged_at = None
+        while True:
+            claimed, done = run_pending(options['batch_size'])
+            total += claimed
+            if claimed:
+                self.stdout.write(f'Выполнено {done} из {claimed} задач')
+                continue
+            if purged_at is None or time.monotonic() - purged_at > (
+                PURGE_INTERVAL
+            ):
+                purged_at = time.monotonic()
+                purged = purge_done(timezone.now())
+                if purged:
+                    self.stdout.write(f'Удалено выполненных задач: {purged}')
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано задач: {total}'))
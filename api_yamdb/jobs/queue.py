@@ -0,0 +1,137 @@
+import json
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def handler(name):
+    """Регистрирует обработчик задач с именем name.
+
+    Обработчик получает список payload всех взятых задач этого типа и
+    возвращает список той же длины: None для выполненной задачи или
+    исключение для задачи, которую нужно повторить.
+    """
+    def decorator(func):
+        _handlers[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, **payload):
+    """Ставит задачу в очередь или, при JOBS_EAGER, выполняет сразу."""
+    if name not in _handlers:
+        raise LookupError(f'Обработчик {name} не зарегистрирован')
+    if settings.JOBS_EAGER:
+        error, = _handlers[name]([payload])
+        if error is not None:
+            raise error
+        return None
+    return Job.objects.create(name=name, payload=json.dumps(payload))
+
+
+def lock(queryset):
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True)
+    return queryset
+
+
+def release_stale(now):
+    """Возвращает задачи, воркер которых не отчитался за JOBS_LOCK_TIMEOUT.
+
+    Такая задача считается неудачной попыткой: задача, которая роняет
+    воркер, не должна браться заново бесконечно.
+    """
+    timeout = settings.JOBS_LOCK_TIMEOUT
+    stale = lock(Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=timeout)
+    ))
+    for job in stale:
+        finish(job, TimeoutError(f'Воркер не завершил задачу за {timeout} с'))
+
+
+def claim(limit):
+    """Забирает готовые к запуску задачи, не мешая другим процессам."""
+    now = timezone.now()
+    with transaction.atomic():
+        release_stale(now)
+        queryset = lock(Job.objects.filter(
+            status=Job.PENDING, run_at__lte=now
+        ))
+        jobs = list(queryset[:limit])
+        Job.objects.filter(
+            pk__in=[job.pk for job in jobs]
+        ).update(status=Job.RUNNING, locked_at=now)
+    return jobs
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def finish(job, error):
+    job.attempts += 1
+    job.locked_at = None
+    if error is None:
+        job.status = Job.DONE
+        job.last_error = ''
+    elif job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+        job.status = Job.FAILED
+        job.last_error = repr(error)
+    else:
+        job.status = Job.PENDING
+        job.last_error = repr(error)
+        job.run_at = timezone.now() + retry_delay(job.attempts)
+    job.save(update_fields=(
+        'attempts', 'locked_at', 'status', 'last_error', 'run_at'
+    ))
+
+
+def run_jobs(jobs):
+    """Выполняет задачи пачками по обработчику, возвращает число успешных."""
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[job.name].append(job)
+    done = 0
+    for name, group in groups.items():
+        func = _handlers.get(name)
+        try:
+            if func is None:
+                raise LookupError(f'Обработчик {name} не зарегистрирован')
+            errors = func([json.loads(job.payload) for job in group])
+        except Exception as error:
+            logger.exception('Задачи %s завершились ошибкой', name)
+            errors = [error] * len(group)
+        for job, error in zip(group, errors):
+            finish(job, error)
+            done += error is None
+    return done
+
+
+def purge_done(now):
+    """Удаляет выполненные задачи старше JOBS_DONE_RETENTION_DAYS.
+
+    Неудачные задачи остаются для разбора. Условие по статусу и run_at
+    обслуживает индекс job_status_run_at_idx.
+    """
+    before = now - timedelta(days=settings.JOBS_DONE_RETENTION_DAYS)
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE, run_at__lt=before
+    ).delete()
+    return deleted
+
+
+def run_pending(limit):
+    """Один проход воркера: возвращает (взято задач, выполнено)."""
+    jobs = claim(limit)
+    return len(jobs), run_jobs(jobs)
@@ -0,0 +1,42 @@
+import logging
+
+from django.core.mail import EmailMessage, get_connection
+
+from .queue import handler
+
+logger = logging.getLogger(__name__)
+
+
+@handler('send_mail')
+def send_mail(payloads):
+    """Отправляет пачку писем через одно соединение с почтовым сервером.
+
+    Результат считается для каждого письма: любая ошибка отправки
+    повторяет только это письмо, а уже доставленные не отправляются
+    заново. Ошибка открытия соединения повторяет всю пачку - ни одно
+    письмо из неё не ушло.
+    """
+    errors = []
+    connection = get_connection()
+    connection.open()
+    try:
+        for payload in payloads:
+            try:
+                EmailMessage(
+                    payload['subject'],
+                    payload['body'],
+                    payload['from_email'],
+                    payload['to'],
+                    connection=connection,
+                ).send()
+            except Exception as error:
+                errors.append(error)
+            else:
+                errors.append(None)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            # Письма уже переданы серверу, повторять их нельзя
+            logger.exception('Не удалось закрыть соединение с почтой')
+    return errors
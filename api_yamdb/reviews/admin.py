@@ -1,7 +1,8 @@
 from django.contrib import admin
 from users.models import User
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import (SCORES, Category, Comment, Genre, Review, Title,
+                     score_field)
 
 
 class ReviewsAdmin(admin.ModelAdmin):
@@ -12,9 +13,16 @@ class ReviewsAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class TitleAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'year', 'category', 'rating')
+    readonly_fields = ('rating_sum', 'rating_count', 'rating',
+                       *(score_field(score) for score in SCORES))
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(User)
 admin.site.register(Review, ReviewsAdmin)
 admin.site.register(Category)
 admin.site.register(Comment)
 admin.site.register(Genre)
-admin.site.register(Title)
+admin.site.register(Title, TitleAdmin)
@@ -0,0 +1,103 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time
+
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Review
+
+# Колонки совпадают с форматом manage.py import_data, поэтому выгрузку
+# можно загрузить обратно.
+EXPORTS = {
+    'review': (Review, (
+        ('id', 'id'),
+        ('title', 'title_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('score', 'score'),
+        ('pub_date', 'pub_date'),
+    )),
+    'comment': (Comment, (
+        ('id', 'id'),
+        ('title', 'review__title_id'),
+        ('review', 'review_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+    )),
+}
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def parse_since(value):
+    """Дата или дата и время; None, если значение не распознано."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = day and datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    return moment
+
+
+def export_rows(kind, since=None, chunk_size=2000):
+    """Строки выгрузки по возрастанию pub_date с серверным курсором."""
+    model, columns = EXPORTS[kind]
+    queryset = model.objects.order_by('pub_date', 'id')
+    if since is not None:
+        queryset = queryset.filter(pub_date__gt=since)
+    names = [name for name, _ in columns]
+    rows = queryset.values_list(
+        *[lookup for _, lookup in columns]
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield dict(zip(names, row))
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def render(kind, rows, file_format):
+    """Построчно кодирует выгрузку в NDJSON или CSV."""
+    if file_format == 'ndjson':
+        for row in rows:
+            row['pub_date'] = row['pub_date'].isoformat()
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+        return
+    _, columns = EXPORTS[kind]
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows:
+        row['pub_date'] = row['pub_date'].isoformat()
+        yield writer.writerow(row.values())
+
+
+def encode(chunks, compress=False, buffer_size=64 * 1024):
+    """Склеивает строки в блоки байтов и при необходимости сжимает gzip."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            block = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor is not None:
+                block = compressor.compress(block)
+            if block:
+                yield block
+    block = b''.join(buffer)
+    if compressor is not None:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
@@ -0,0 +1,115 @@
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from reviews.models import Comment, Review, Title
+
+EXPLAIN = {
+    'postgresql': ('EXPLAIN ', re.compile(r'Seq Scan on (\w+)')),
+    'sqlite': ('EXPLAIN QUERY PLAN ',
+               re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')),
+}
+
+
+def own_cache():
+    """Отдельный кэш ответов, который очищается перед каждым запросом."""
+    return override_settings(
+        CACHES={**settings.CACHES, 'explain': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'explain',
+        }},
+        API_CACHE_ALIAS='explain',
+    )
+
+
+def endpoints():
+    """Адреса списков с фильтрами на примерах из базы."""
+    yield '/api/v1/categories/'
+    yield '/api/v1/genres/'
+    yield '/api/v1/titles/'
+    yield '/api/v1/titles/?pagination=cursor'
+    title = Title.objects.filter(
+        genre__isnull=False
+    ).values('year', 'category__slug', 'genre__slug').first()
+    if title is not None:
+        yield f'/api/v1/titles/?category={title["category__slug"]}'
+        yield f'/api/v1/titles/?genre={title["genre__slug"]}'
+        yield f'/api/v1/titles/?year={title["year"]}'
+    review = Review.objects.values('title').first()
+    if review is not None:
+        yield f'/api/v1/titles/{review["title"]}/reviews/'
+    comment = Comment.objects.values('review__title', 'review').first()
+    if comment is not None:
+        yield (f'/api/v1/titles/{comment["review__title"]}/reviews/'
+               f'{comment["review"]}/comments/')
+
+
+class Command(BaseCommand):
+    help = ('Выполняет запросы списков API, показывает планы их SQL-запросов '
+            'и отмечает последовательное чтение таблиц. Запускать на базе '
+            'с данными: на маленьких таблицах планировщик PostgreSQL '
+            'предпочитает Seq Scan индексу')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail',
+            action='store_true',
+            help='Завершиться с ошибкой, если найдено последовательное чтение',
+        )
+
+    def capture(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def run(self, path):
+        """SELECT-запросы, выполненные при ответе на GET path."""
+        self.statements = []
+        with own_cache():
+            # Иначе ответ придёт из кэша без запросов к базе
+            caches['explain'].clear()
+            with connection.execute_wrapper(self.capture):
+                response = Client().get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path}: ответ {response.status_code}')
+        return self.statements
+
+    def explain(self, sql, params):
+        prefix, scan = EXPLAIN[connection.vendor]
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        tables = sorted({match.group(1) for line in plan
+                         for match in [scan.search(line.strip())] if match})
+        return plan, tables
+
+    def handle(self, *args, **options):
+        if connection.vendor not in EXPLAIN:
+            raise CommandError(
+                f'EXPLAIN для {connection.vendor} не поддерживается'
+            )
+        found = 0
+        for path in endpoints():
+            self.stdout.write(path)
+            for sql, params in self.run(path):
+                plan, tables = self.explain(sql, params)
+                verbose = options['verbosity'] > 1
+                if tables:
+                    found += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  Seq Scan: {", ".join(tables)}'
+                    ))
+                if tables or verbose:
+                    self.stdout.write(f'    {sql}')
+                if verbose:
+                    self.stdout.write('\n'.join(
+                        f'    {line}' for line in plan
+                    ))
+        if found and options['fail']:
+            raise CommandError(f'Последовательное чтение в {found} запросах')
+        self.stdout.write(self.style.SUCCESS(
+            f'Запросов с последовательным чтением: {found}'
+        ))
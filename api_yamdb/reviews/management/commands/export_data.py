@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews import export
+
+
+class Command(BaseCommand):
+    help = 'Выгружает отзывы или комментарии в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=export.EXPORTS)
+        parser.add_argument('--format', choices=export.FORMATS,
+                            default='ndjson', dest='file_format')
+        parser.add_argument('--since',
+                            help='Только записи новее этой даты')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--output', default='-',
+                            help='Путь к файлу; по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since is not None:
+            since = export.parse_since(since)
+            if since is None:
+                raise CommandError('Неверный формат даты в --since')
+        rows = export.export_rows(options['kind'], since,
+                                  options['chunk_size'])
+        blocks = export.encode(
+            export.render(options['kind'], rows, options['file_format']),
+            options['gzip'],
+        )
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+            for block in blocks:
+                output.write(block)
+            output.flush()
+            return
+        with open(options['output'], 'wb') as output:
+            for block in blocks:
+                output.write(block)
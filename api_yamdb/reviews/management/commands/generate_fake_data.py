@@ -0,0 +1,208 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from api.cache import invalidate
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews.models import SCORES, Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .import_data import chunked, keep_pub_date
+
+GenreTitle = Title.genre.through
+
+# Размер набора при --scale 1; --scale 20 даёт миллион отзывов
+SIZES = {
+    'categories': 10,
+    'genres': 30,
+    'titles': 2000,
+    'users': 5000,
+    'reviews': 50000,
+    'comments': 100000,
+}
+# Оценки смещены к 7-8, как в живых каталогах
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 14, 10, 6)
+WORDS = ('фильм', 'книга', 'сюжет', 'герой', 'финал', 'автор', 'музыка',
+         'актёр', 'сцена', 'глава', 'смысл', 'стиль', 'ритм', 'образ',
+         'хорошо', 'скучно', 'сильно', 'неожиданно', 'красиво', 'долго')
+
+
+def zipf_weights(count, skew):
+    """Веса по закону Ципфа: k-й по популярности получает 1 / k**skew."""
+    return [1 / rank ** skew for rank in range(1, count + 1)]
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными для нагрузочных тестов: '
+            'популярность произведений и отзывов распределена по закону '
+            'Ципфа, оценки смещены к высоким')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1,
+            help='Множитель размеров набора по умолчанию',
+        )
+        for name, size in SIZES.items():
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                help=f'Сколько создать, по умолчанию {size} * scale',
+            )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней распределить даты отзывов',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix',
+            default='fake',
+            help='Префикс имён и slug; для повторного запуска нужен другой',
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        self.prefix = options['prefix']
+        self.now = timezone.now()
+        self.period = timedelta(days=options['days']).total_seconds()
+        sizes = {
+            name: options[name] if options[name] is not None
+            else max(1, round(size * options['scale']))
+            for name, size in SIZES.items()
+        }
+        if min(sizes['categories'], sizes['genres'], sizes['titles'],
+               sizes['users']) < 1:
+            raise CommandError('Нужны хотя бы одна категория, один жанр, '
+                               'одно произведение и один пользователь')
+        if Category.objects.filter(slug=f'{self.prefix}-0').exists():
+            raise CommandError(f'Данные с префиксом {self.prefix} уже есть')
+        started = time.monotonic()
+
+        categories = self.create(Category, (
+            Category(name=f'Категория {self.prefix} {number}',
+                     slug=f'{self.prefix}-{number}')
+            for number in range(sizes['categories'])
+        ))
+        genres = self.create(Genre, (
+            Genre(name=f'Жанр {self.prefix} {number}',
+                  slug=f'{self.prefix}-{number}')
+            for number in range(sizes['genres'])
+        ))
+        titles = self.create_titles(sizes['titles'], categories, genres)
+        users = self.create(User, (
+            User(username=f'{self.prefix}_user_{number}',
+                 email=f'{self.prefix}_user_{number}@yamdb.fake',
+                 password='!')
+            for number in range(sizes['users'])
+        ))
+        with keep_pub_date(Review), keep_pub_date(Comment):
+            reviews = self.create(Review, self.build_reviews(
+                sizes['reviews'], titles, users
+            ))
+            self.create(Comment, self.build_comments(
+                sizes['comments'], reviews, users
+            ))
+
+        if reviews:
+            # Новые отзывы идут подряд после уже существующих
+            Review.objects.filter(
+                pk__gte=reviews[0]
+            ).recalculate_comments_count()
+        call_command('recalculate_ratings', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        invalidate('categories', 'genres', 'titles', 'rankings')
+        self.stdout.write(self.style.SUCCESS(
+            f'Набор {sizes} создан за {time.monotonic() - started:.1f} с'
+        ))
+
+    def create(self, model, objects):
+        """Вставляет объекты блоками и возвращает id новых строк."""
+        last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        created = 0
+        for chunk in chunked(iter(objects), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+            created += len(chunk)
+            self.stdout.write(f'{model._meta.model_name}: {created}')
+        return list(model.objects.filter(pk__gt=last_pk).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+
+    def text(self, low, high):
+        words = self.random.choices(WORDS, k=self.random.randint(low, high))
+        return ' '.join(words).capitalize() + '.'
+
+    def pub_date(self):
+        return self.now - timedelta(
+            seconds=self.random.random() * self.period
+        )
+
+    def popular(self, items):
+        """Элементы в случайном порядке и веса их популярности."""
+        ranked = list(items)
+        self.random.shuffle(ranked)
+        return ranked, zipf_weights(len(ranked), self.skew)
+
+    def create_titles(self, count, categories, genres):
+        ranked, weights = self.popular(categories)
+        titles = self.create(Title, (
+            Title(name=f'Произведение {self.prefix} {number}',
+                  year=self.random.randint(1950, self.now.year),
+                  description=self.text(5, 20)[:200],
+                  category_id=self.random.choices(ranked, weights)[0])
+            for number in range(count)
+        ))
+        ranked, weights = self.popular(genres)
+        links = (
+            GenreTitle(title_id=title_id, genre_id=genre_id)
+            for title_id in titles
+            for genre_id in set(self.random.choices(
+                ranked, weights, k=self.random.randint(1, 3)
+            ))
+        )
+        for chunk in chunked(links, self.batch_size):
+            GenreTitle.objects.bulk_create(chunk)
+        return titles
+
+    def build_reviews(self, count, titles, users):
+        """Отзывы по популярности произведений, автор на отзыв - один."""
+        ranked, weights = self.popular(titles)
+        total = sum(weights)
+        for title_id, weight in zip(ranked, weights):
+            reviews = min(round(count * weight / total), len(users))
+            for author_id in self.random.sample(users, reviews):
+                yield Review(
+                    title_id=title_id, author_id=author_id,
+                    text=self.text(10, 60), pub_date=self.pub_date(),
+                    score=self.random.choices(SCORES, SCORE_WEIGHTS)[0],
+                )
+
+    def build_comments(self, count, reviews, users):
+        if not reviews:
+            return
+        ranked, weights = self.popular(reviews)
+        cumulative = list(accumulate(weights))
+        for _ in range(count):
+            review_id, = self.random.choices(ranked, cum_weights=cumulative)
+            yield Comment(
+                review_id=review_id,
+                author_id=self.random.choice(users),
+                text=self.text(3, 30), pub_date=self.pub_date(),
+            )
@@ -0,0 +1,189 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from api.cache import invalidate
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+GenreTitle = Title.genre.through
+
+# Поля файла для каждой сущности. Ссылки на категории и жанры задаются
+# slug, на авторов - username, на произведения и отзывы - id.
+SCHEMAS = {
+    'category': (Category, ('id', 'name', 'slug')),
+    'genre': (Genre, ('id', 'name', 'slug')),
+    'title': (Title, ('id', 'name', 'year', 'description', 'category')),
+    'genre_title': (GenreTitle, ('title', 'genre')),
+    'user': (User, ('id', 'username', 'email', 'role', 'bio',
+                    'first_name', 'last_name')),
+    'review': (Review, ('id', 'title', 'author', 'text', 'score',
+                        'pub_date')),
+    'comment': (Comment, ('id', 'review', 'author', 'text', 'pub_date')),
+}
+LOOKUPS = {
+    'category': (Category, 'slug'),
+    'genre': (Genre, 'slug'),
+    'author': (User, 'username'),
+}
+
+
+def read_rows(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+def chunked(rows, size):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def keep_pub_date(model):
+    """Отключает auto_now_add, чтобы сохранить даты из файла."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает CSV или JSONL с категориями, жанрами, '
+            'произведениями, пользователями, отзывами и комментариями')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=SCHEMAS)
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить с последнего сохранённого блока',
+        )
+
+    def handle(self, *args, **options):
+        kind, path = options['kind'], options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        model, columns = SCHEMAS[kind]
+        self.lookups = {}
+        self.now = timezone.now()
+        checkpoint = f'{path}.checkpoint'
+        done = self.read_checkpoint(checkpoint) if options['resume'] else 0
+
+        rows = islice(read_rows(path), done, None)
+        started = time.monotonic()
+        imported = 0
+        with keep_pub_date(model):
+            for chunk in chunked(rows, options['batch_size']):
+                objects = [
+                    self.build(model, columns, row, path, done + number)
+                    for number, row in enumerate(chunk, 1)
+                ]
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        objects, ignore_conflicts=options['resume']
+                    )
+                done += len(chunk)
+                imported += len(chunk)
+                self.write_checkpoint(checkpoint, done)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{kind}: {done} строк, '
+                    f'{imported / elapsed:.0f} строк/с'
+                )
+        self.finish(kind, model)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {imported} строк {kind} за '
+            f'{time.monotonic() - started:.1f} с'
+        ))
+
+    def lookup(self, name, value):
+        if name not in self.lookups:
+            model, field = LOOKUPS[name]
+            self.lookups[name] = dict(
+                model.objects.values_list(field, 'pk').iterator()
+            )
+        try:
+            return self.lookups[name][value]
+        except KeyError:
+            raise CommandError(f'Не найден {name} «{value}»')
+
+    def build(self, model, columns, row, path, number):
+        """Объект из строки файла; значения проверяются валидаторами полей
+        модели, например диапазоном оценки 1-10."""
+        values = {}
+        for column in columns:
+            value = row.get(column)
+            if value in (None, ''):
+                if column == 'pub_date':
+                    values[column] = self.now
+                continue
+            try:
+                if column in LOOKUPS:
+                    values[f'{column}_id'] = self.lookup(column, value)
+                    continue
+                field = model._meta.get_field(column)
+                if field.is_relation:
+                    # Существование строки проверит внешний ключ в базе
+                    values[field.attname] = field.to_python(value)
+                else:
+                    values[field.attname] = field.clean(value, None)
+            except ValidationError as error:
+                raise CommandError(f'{path}, запись {number}, {column}: '
+                                   f'{" ".join(error.messages)}')
+            except CommandError as error:
+                raise CommandError(f'{path}, запись {number}: {error}')
+        return model(**values)
+
+    def finish(self, kind, model):
+        if model is not GenreTitle:
+            statements = connection.ops.sequence_reset_sql(
+                no_style(), [model]
+            )
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+        if kind == 'review':
+            call_command('recalculate_ratings', stdout=self.stdout)
+        if kind == 'comment':
+            Review.objects.recalculate_comments_count()
+        if kind == 'title':
+            call_command('rebuild_search_index', stdout=self.stdout)
+        invalidate('categories', 'genres', 'titles')
+
+    @staticmethod
+    def read_checkpoint(path):
+        if not os.path.exists(path):
+            return 0
+        with open(path) as file:
+            return json.load(file)['rows']
+
+    @staticmethod
+    def write_checkpoint(path, rows):
+        with open(path, 'w') as file:
+            json.dump({'rows': rows}, file)
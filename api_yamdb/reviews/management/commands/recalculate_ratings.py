@@ -0,0 +1,46 @@
+from api.cache import invalidate
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённый рейтинг произведений по отзывам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество произведений, обновляемых в одной транзакции',
+        )
+        parser.add_argument(
+            '--title',
+            type=int,
+            action='append',
+            dest='titles',
+            help='id произведения; можно указать несколько раз',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Title.objects.order_by('pk')
+        if options['titles']:
+            queryset = queryset.filter(pk__in=options['titles'])
+        updated = 0
+        last_pk = 0
+        while True:
+            ids = list(queryset.filter(pk__gt=last_pk).values_list(
+                'pk', flat=True
+            )[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += Title.objects.filter(
+                    pk__in=ids
+                ).recalculate_rating()
+            last_pk = ids[-1]
+        invalidate('titles')
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {updated} произведений'
+        ))
@@ -0,0 +1,45 @@
+from api.cache import invalidate
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги лучших и популярных произведений; '
+            'запускается периодически, например из cron')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=settings.RANKING_SIZE,
+            help='Сколько произведений хранить в каждом рейтинге',
+        )
+        parser.add_argument(
+            '--min-reviews',
+            type=int,
+            default=settings.RANKING_MIN_REVIEWS,
+            help='Минимум отзывов для попадания в лучшие',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.RANKING_TRENDING_DAYS,
+            help='За сколько дней считать отзывы для популярных',
+        )
+        parser.add_argument(
+            '--trending-min-reviews',
+            type=int,
+            default=settings.RANKING_TRENDING_MIN_REVIEWS,
+            help='Минимум отзывов за период для попадания в популярные',
+        )
+
+    def handle(self, *args, **options):
+        total = refresh_rankings(
+            options['limit'], options['min_reviews'],
+            options['days'], options['trending_min_reviews'],
+        )
+        invalidate('rankings')
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги пересчитаны, позиций: {total}'
+        ))
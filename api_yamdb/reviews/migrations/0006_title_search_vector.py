@@ -0,0 +1,46 @@
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS title_search_vector_idx '
+    'ON reviews_title USING gin (search_vector)',
+    'CREATE INDEX IF NOT EXISTS title_name_trgm_idx '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for sql in SEARCH_INDEXES:
+        schema_editor.execute(sql)
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.update(
+        search_vector=SearchVector('name', weight='A', config='simple')
+        + SearchVector('description', weight='B', config='simple')
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS title_search_vector_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS title_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
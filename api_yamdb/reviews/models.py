@@ -1,5 +1,11 @@
+from collections import Counter
+
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import (Case, Count, F, IntegerField, OuterRef, Prefetch,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce
 from users.models import User
 
 
@@ -11,6 +17,9 @@ class Category(models.Model):
                             verbose_name='Относительный адрес категории')
 
     class Meta:
+        indexes = [
+            models.Index(fields=['name'], name='category_name_idx'),
+        ]
         ordering = ('name',)
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
@@ -27,6 +36,9 @@ class Genre(models.Model):
                             verbose_name='Относительный адрес жанра')
 
     class Meta:
+        indexes = [
+            models.Index(fields=['name'], name='genre_name_idx'),
+        ]
         ordering = ('name',)
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
@@ -35,7 +47,83 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class VersionedModel(models.Model):
+    """Модель с номером версии, растущим при каждом сохранении."""
+    version = models.PositiveIntegerField(default=1,
+                                          editable=False,
+                                          verbose_name='Версия')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    return f'score_{score}'
+
+
+class TitleQuerySet(models.QuerySet):
+    def change_rating(self, title_id, added=(), removed=()):
+        """Атомарно учитывает добавленные и удалённые оценки произведения.
+
+        Сумма, количество, рейтинг и счётчики по каждой оценке меняются
+        одним UPDATE, поэтому конкурентные изменения отзывов не теряют
+        друг друга.
+        """
+        score_delta = sum(added) - sum(removed)
+        count_delta = len(added) - len(removed)
+        histogram = Counter(added)
+        histogram.subtract(removed)
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.filter(pk=title_id).update(
+            version=F('version') + 1,
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=Case(
+                When(rating_count=-count_delta, then=Value(None)),
+                default=rating_sum / rating_count,
+                output_field=IntegerField(),
+            ),
+            **{score_field(score): F(score_field(score)) + delta
+               for score, delta in histogram.items() if delta},
+        )
+
+    def recalculate_rating(self):
+        """Пересчитывает рейтинг и распределение оценок по отзывам."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        rating_sum = reviews.annotate(value=Sum('score')).values('value')
+        rating_count = reviews.annotate(value=Count('id')).values('value')
+        rating = reviews.annotate(
+            value=Sum('score') / Count('id')
+        ).values('value')
+        histogram = {
+            score_field(score): Coalesce(Subquery(
+                reviews.filter(score=score).annotate(
+                    value=Count('id')
+                ).values('value')
+            ), 0)
+            for score in SCORES
+        }
+        return self.update(
+            version=F('version') + 1,
+            rating_sum=Coalesce(Subquery(rating_sum), 0),
+            rating_count=Coalesce(Subquery(rating_count), 0),
+            rating=Subquery(rating, output_field=IntegerField()),
+            **histogram,
+        )
+
+
+class Title(VersionedModel):
     """Модель произведений"""
     name = models.CharField(max_length=50,
                             verbose_name='Произведение')
@@ -54,8 +142,36 @@ class Title(models.Model):
                                  blank=True,
                                  default=None
                                  )
+    rating_sum = models.PositiveIntegerField(default=0,
+                                             verbose_name='Сумма оценок')
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок'
+    )
+    rating = models.PositiveSmallIntegerField(null=True,
+                                              blank=True,
+                                              verbose_name='Рейтинг')
+    search_vector = SearchVectorField(null=True, editable=False)
+    score_1 = models.PositiveIntegerField(default=0, verbose_name='Оценок 1')
+    score_2 = models.PositiveIntegerField(default=0, verbose_name='Оценок 2')
+    score_3 = models.PositiveIntegerField(default=0, verbose_name='Оценок 3')
+    score_4 = models.PositiveIntegerField(default=0, verbose_name='Оценок 4')
+    score_5 = models.PositiveIntegerField(default=0, verbose_name='Оценок 5')
+    score_6 = models.PositiveIntegerField(default=0, verbose_name='Оценок 6')
+    score_7 = models.PositiveIntegerField(default=0, verbose_name='Оценок 7')
+    score_8 = models.PositiveIntegerField(default=0, verbose_name='Оценок 8')
+    score_9 = models.PositiveIntegerField(default=0, verbose_name='Оценок 9')
+    score_10 = models.PositiveIntegerField(default=0,
+                                           verbose_name='Оценок 10')
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            models.Index(fields=['category', 'name', 'id'],
+                         name='title_category_name_idx'),
+        ]
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
@@ -63,8 +179,70 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def histogram(self):
+        return {score: getattr(self, score_field(score)) for score in SCORES}
+
+    @property
+    def mean_score(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def median_score(self):
+        """Медиана по счётчикам оценок, без чтения отзывов."""
+        if not self.rating_count:
+            return None
+        middle = ((self.rating_count - 1) // 2, self.rating_count // 2)
+        values = []
+        seen = 0
+        for score, count in self.histogram.items():
+            values.extend(score for position in middle
+                          if seen <= position < seen + count)
+            seen += count
+        return sum(values) / len(values)
+
+
+class ReviewQuerySet(models.QuerySet):
+    def change_comments_count(self, review_id, delta):
+        """Атомарно сдвигает счётчик комментариев отзыва."""
+        return self.filter(pk=review_id).update(
+            version=F('version') + 1,
+            comments_count=F('comments_count') + delta,
+        )
 
-class Review(models.Model):
+    def recalculate_comments_count(self):
+        """Пересчитывает счётчик по таблице комментариев."""
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by().values('review').annotate(
+            value=Count('id')
+        ).values('value')
+        return self.update(
+            version=F('version') + 1,
+            comments_count=Coalesce(Subquery(comments), 0),
+        )
+
+    def with_latest_comments(self, limit):
+        """Последние limit комментариев отзывов в latest_comments.
+
+        Все превью страницы выбираются одним запросом: комментарий
+        попадает в него, если входит в limit последних своего отзыва.
+        """
+        latest = Comment.objects.filter(
+            review=OuterRef('review')
+        ).order_by('-pub_date', '-id').values('pk')[:limit]
+        return self.prefetch_related(Prefetch(
+            'comments',
+            queryset=Comment.objects.filter(
+                pk__in=Subquery(latest)
+            ).select_related('author').order_by('-pub_date', '-id'),
+            to_attr='latest_comments',
+        ))
+
+
+class Review(VersionedModel):
     """Модель отзывов"""
     text = models.TextField(verbose_name='Содержание отзыва')
     author = models.ForeignKey(User,
@@ -83,6 +261,13 @@ class Review(models.Model):
                               related_name='review',
                               verbose_name='Произведение',
                               )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         constraints = [
@@ -91,6 +276,10 @@ class Review(models.Model):
                 name='unique_review_author'
             )
         ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'),
+        ]
         ordering = ('-pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -99,7 +288,7 @@ class Review(models.Model):
         return self.text[:30]
 
 
-class Comment(models.Model):
+class Comment(VersionedModel):
     """Модель комментариев к отзывам"""
     review = models.ForeignKey(Review,
                                on_delete=models.CASCADE,
@@ -116,9 +305,67 @@ class Comment(models.Model):
                                     verbose_name='Дата и время комментария')
 
     class Meta:
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'),
+        ]
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text[:30]
+
+
+class TitleRanking(models.Model):
+    """Позиция произведения в заранее посчитанном рейтинге.
+
+    Таблицу целиком перестраивает manage.py refresh_rankings. Общий
+    рейтинг хранится без жанра и категории, рейтинги внутри жанра или
+    категории - с заполненным полем genre или category.
+    """
+    TOP = 'top'
+    TRENDING = 'trending'
+
+    KIND_CHOICES = (
+        (TOP, 'Лучшие по оценке'),
+        (TRENDING, 'Популярные за неделю'),
+    )
+
+    kind = models.CharField(max_length=16,
+                            choices=KIND_CHOICES,
+                            verbose_name='Рейтинг')
+    genre = models.ForeignKey(Genre,
+                              on_delete=models.CASCADE,
+                              null=True,
+                              blank=True,
+                              related_name='rankings',
+                              verbose_name='Жанр')
+    category = models.ForeignKey(Category,
+                                 on_delete=models.CASCADE,
+                                 null=True,
+                                 blank=True,
+                                 related_name='rankings',
+                                 verbose_name='Категория')
+    position = models.PositiveIntegerField(verbose_name='Место')
+    title = models.ForeignKey(Title,
+                              on_delete=models.CASCADE,
+                              related_name='rankings',
+                              verbose_name='Произведение')
+    score = models.FloatField(verbose_name='Значение')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+    refreshed_at = models.DateTimeField(verbose_name='Пересчитано')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'genre', 'category', 'position'],
+                         name='ranking_scope_position_idx'),
+        ]
+        ordering = ('kind', 'position')
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Рейтинги'
+
+    def __str__(self):
+        return f'{self.kind} #{self.position}: {self.title_id}'
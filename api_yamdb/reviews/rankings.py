@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField
+from django.utils import timezone
+
+from .models import Category, Genre, Review, Title, TitleRanking
+
+
+def top_rows(titles, limit, min_reviews):
+    """(id, средняя оценка, число отзывов) лучших произведений."""
+    return titles.filter(rating_count__gte=max(min_reviews, 1)).annotate(
+        average=ExpressionWrapper(
+            F('rating_sum') * 1.0 / F('rating_count'),
+            output_field=FloatField(),
+        )
+    ).order_by('-average', '-rating_count', 'id').values_list(
+        'id', 'average', 'rating_count'
+    )[:limit]
+
+
+def trending_rows(reviews, limit, min_reviews):
+    """(id, отзывы за период, отзывы за период) самых обсуждаемых."""
+    return reviews.values('title').annotate(
+        recent=Count('id')
+    ).filter(recent__gte=max(min_reviews, 1)).order_by(
+        '-recent', 'title'
+    ).values_list('title', 'recent', 'recent')[:limit]
+
+
+def scopes():
+    """Общий рейтинг, затем по каждому жанру и каждой категории."""
+    yield {}
+    for genre_id in Genre.objects.values_list('pk', flat=True):
+        yield {'genre': genre_id}
+    for category_id in Category.objects.values_list('pk', flat=True):
+        yield {'category': category_id}
+
+
+def build_rankings(limit, min_reviews, days, trending_min_reviews):
+    now = timezone.now()
+    recent = Review.objects.filter(pub_date__gte=now - timedelta(days=days))
+    rankings = []
+    for scope in scopes():
+        titles = Title.objects.filter(**scope)
+        reviews = recent.filter(**{
+            f'title__{field}': pk for field, pk in scope.items()
+        })
+        scope_ids = {f'{field}_id': pk for field, pk in scope.items()}
+        for kind, rows in (
+            (TitleRanking.TOP, top_rows(titles, limit, min_reviews)),
+            (TitleRanking.TRENDING,
+             trending_rows(reviews, limit, trending_min_reviews)),
+        ):
+            rankings.extend(
+                TitleRanking(kind=kind, position=position, title_id=title_id,
+                             score=score, reviews_count=count,
+                             refreshed_at=now, **scope_ids)
+                for position, (title_id, score, count)
+                in enumerate(rows, start=1)
+            )
+    return rankings
+
+
+def refresh_rankings(limit, min_reviews, days, trending_min_reviews):
+    """Пересобирает таблицу рейтингов в одной транзакции."""
+    rankings = build_rankings(limit, min_reviews, days, trending_min_reviews)
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        TitleRanking.objects.bulk_create(rankings)
+    return len(rankings)
@@ -0,0 +1,143 @@
+"""Микробенчмарки представлений API через тестовый клиент Django.
+
+Для каждого сценария (список, фильтр, объект, отзывы, комментарии...)
+измеряет время ответа, число SQL-запросов и размер тела. По умолчанию
+создаёт временную SQLite-базу и заполняет её generate_fake_data; с
+--use-db работает с базой из переменных DB_*, заполненной заранее.
+Перед каждым запросом кэш ответов очищается, --warm оставляет его.
+
+    python benchmarks/api_views.py --output before.json
+    python benchmarks/api_views.py --output after.json
+    python benchmarks/compare.py before.json after.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from io import StringIO
+
+from common import ROOT_DIR, summary, write_results
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api_yamdb'))
+
+
+def setup_django(db_name=None):
+    if db_name is not None:
+        os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+        os.environ['DB_NAME'] = db_name
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+
+
+def populate(scale, seed):
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    call_command('generate_fake_data', scale=scale, seed=seed,
+                 stdout=StringIO())
+    call_command('refresh_rankings', stdout=StringIO())
+
+
+def scenarios():
+    """(имя, адрес) на примерах из базы: самые популярные объекты."""
+    from django.db.models import Count
+    from reviews.models import Genre, Review, Title
+
+    title = Title.objects.order_by('-rating_count', 'pk').first()
+    genre = Genre.objects.annotate(
+        titles=Count('title')
+    ).order_by('-titles').first()
+    review = Review.objects.filter(title=title).order_by(
+        '-comments_count'
+    ).first()
+    titles = f'/api/v1/titles/{title.pk}'
+    reviews = f'{titles}/reviews'
+    return [
+        ('categories-list', '/api/v1/categories/'),
+        ('genres-list', '/api/v1/genres/'),
+        ('titles-list', '/api/v1/titles/'),
+        ('titles-list-sparse', '/api/v1/titles/?fields=id,name,rating'),
+        ('titles-list-cursor', '/api/v1/titles/?pagination=cursor'),
+        ('titles-filter-genre', f'/api/v1/titles/?genre={genre.slug}'),
+        ('titles-search', '/api/v1/titles/?search=Произведение'),
+        ('titles-top', '/api/v1/titles/top/'),
+        ('titles-detail', f'{titles}/'),
+        ('titles-stats', f'{titles}/stats/'),
+        ('reviews-list', f'{reviews}/'),
+        ('reviews-list-latest-comments',
+         f'{reviews}/?expand=latest_comments'),
+        ('reviews-detail', f'{reviews}/{review.pk}/'),
+        ('comments-list', f'{reviews}/{review.pk}/comments/'),
+    ]
+
+
+def run(path, repeat, warmup, warm):
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client(HTTP_ACCEPT='application/json')
+    cache = caches[settings.API_CACHE_ALIAS]
+    for _ in range(warmup):
+        client.get(path)
+    if not warm:
+        cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(path)
+    queries = len(context.captured_queries)
+    timings = []
+    for _ in range(repeat):
+        if not warm:
+            cache.clear()
+        started = time.perf_counter()
+        client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'path': path,
+        'status': response.status_code,
+        'queries': queries,
+        'bytes': len(response.content),
+        **summary(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=0.05,
+                        help='Размер набора generate_fake_data')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--use-db', action='store_true',
+                        help='База из переменных DB_* вместо временной')
+    parser.add_argument('--warm', action='store_true',
+                        help='Не очищать кэш ответов между запросами')
+    parser.add_argument('--only', action='append',
+                        help='Запустить только указанный сценарий')
+    parser.add_argument('--output', default='-',
+                        help='Файл JSON с результатами, - для stdout')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.use_db:
+            setup_django()
+        else:
+            setup_django(os.path.join(directory, 'bench.sqlite3'))
+            populate(args.scale, args.seed)
+        results = {}
+        for name, path in scenarios():
+            if args.only and name not in args.only:
+                continue
+            results[name] = run(path, args.repeat, args.warmup, args.warm)
+            print(f'{name}: {results[name]["median_ms"]:.2f} мс, '
+                  f'запросов {results[name]["queries"]}', file=sys.stderr)
+        params = {key: value for key, value in vars(args).items()
+                  if key != 'output'}
+        write_results(args.output, 'api_views', params, results)
+
+
+if __name__ == '__main__':
+    main()
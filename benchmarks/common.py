@@ -0,0 +1,66 @@
+"""Общие части скриптов бенчмарков: окружение, статистика, JSON."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(timings, percent):
+    """Перцентиль отсортированного списка с линейной интерполяцией, как
+    statistics.quantiles(method='inclusive'), которого нет в Python 3.7."""
+    position = (len(timings) - 1) * percent / 100
+    index = int(position)
+    if index + 1 == len(timings):
+        return timings[index]
+    fraction = position - index
+    return timings[index] + (timings[index + 1] - timings[index]) * fraction
+
+
+def summary(timings):
+    """Медиана и перцентили в миллисекундах."""
+    timings = sorted(timings)
+    result = {
+        'count': len(timings),
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+    if len(timings) > 1:
+        result['p95_ms'] = round(percentile(timings, 95), 3)
+        result['p99_ms'] = round(percentile(timings, 99), 3)
+    return result
+
+
+def write_results(path, benchmark, params, results):
+    """Сохраняет результаты с ревизией и окружением для сравнения."""
+    document = {
+        'benchmark': benchmark,
+        'revision': git_revision(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'params': params,
+        'results': results,
+    }
+    if path == '-':
+        json.dump(document, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+        return
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+    print(f'Результаты записаны в {path}')
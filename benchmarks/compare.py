@@ -0,0 +1,62 @@
+"""Сравнение двух JSON с результатами api_views.py или load.py.
+
+Печатает изменение медианы (и числа запросов, если оно есть) по каждому
+сценарию и завершается с кодом 1, если медиана выросла больше порога.
+
+    python benchmarks/compare.py before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(before, after, threshold):
+    """Строки отчёта и список сценариев, которые стали медленнее."""
+    lines = []
+    regressions = []
+    for name, new in after['results'].items():
+        old = before['results'].get(name)
+        if old is None:
+            lines.append(f'{name}: новый сценарий')
+            continue
+        if 'median_ms' not in new or 'median_ms' not in old:
+            lines.append(f'{name}: нет успешных запросов для сравнения')
+            continue
+        change = (new['median_ms'] - old['median_ms']) / old['median_ms'] * 100
+        line = (f'{name}: {old["median_ms"]} -> {new["median_ms"]} мс '
+                f'({change:+.1f}%)')
+        if 'queries' in new and new.get('queries') != old.get('queries'):
+            line += f', запросов {old.get("queries")} -> {new["queries"]}'
+        if change > threshold:
+            regressions.append(name)
+            line += ' РЕГРЕССИЯ'
+        lines.append(line)
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='Допустимый рост медианы, %%')
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    if before['benchmark'] != after['benchmark']:
+        sys.exit('Результаты разных бенчмарков')
+    print(f'{before["benchmark"]}: {before["revision"]} -> '
+          f'{after["revision"]}')
+    lines, regressions = compare(before, after, args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        sys.exit(f'Медленнее на {args.threshold}%: {", ".join(regressions)}')
+
+
+if __name__ == '__main__':
+    main()
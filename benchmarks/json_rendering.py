@@ -0,0 +1,103 @@
+"""Время рендеринга и размер страницы /api/v1/titles/ из 30 произведений.
+
+Сравнивает TitleListSerializer с планом из api/fast.py, JSONRenderer
+на стандартном json с FastJSONRenderer на orjson и размер ответа без
+сжатия, с gzip и с brotli (если установлен пакет Brotli). База -
+временный SQLite.
+
+    python benchmarks/json_rendering.py --repeat 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api_yamdb'))
+
+
+def setup_django(db_name):
+    os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+    os.environ['DB_NAME'] = db_name
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def populate(page_size):
+    from reviews.models import Category, Genre, Title
+
+    category = Category.objects.create(name='Фильмы', slug='movies')
+    genres = [Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+              for i in range(5)]
+    for i in range(page_size):
+        title = Title.objects.create(
+            name=f'Произведение {i:03d}', year=1990 + i,
+            description='Описание произведения ' * 6, category=category,
+            rating=i % 10 + 1,
+        )
+        title.genre.set(genres[i % 3:i % 3 + 3])
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--page-size', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'bench.sqlite3'))
+        populate(args.page_size)
+
+        from api.compression import COMPRESSORS
+        from api.fast import build_plan
+        from api.renderers import FastJSONRenderer, orjson
+        from api.serializers import TitleListSerializer
+        from rest_framework.renderers import JSONRenderer
+        from reviews.models import Title
+
+        titles = list(Title.objects.select_related(
+            'category'
+        ).prefetch_related('genre')[:args.page_size])
+        data = {'count': len(titles), 'next': None, 'previous': None,
+                'results': TitleListSerializer(titles, many=True).data}
+
+        serialize = measure(
+            lambda: TitleListSerializer(titles, many=True).data, args.repeat
+        )
+        print(f'TitleListSerializer: {serialize:.0f} мкс')
+        plan = build_plan(TitleListSerializer(), Title)
+        plan.column('id')
+        rows = list(Title.objects.values(*plan.columns)[:args.page_size])
+        assert plan.render(rows) == data['results']
+        fast = measure(lambda: plan.render(rows), args.repeat)
+        print(f'План .values() (с запросом жанров): {fast:.0f} мкс')
+        renderers = [('json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        for name, renderer in renderers:
+            took = measure(lambda: renderer.render(data), args.repeat)
+            print(f'Рендеринг {name}: {took:.0f} мкс')
+
+        content = JSONRenderer().render(data)
+        print(f'Без сжатия: {len(content)} байт')
+        for name, compress in COMPRESSORS.items():
+            took = measure(lambda: compress(content), args.repeat)
+            print(f'{name}: {len(compress(content))} байт, {took:.0f} мкс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Нагрузочный тест запущенного API: конкурентные пользователи.
+
+Как в locust, каждый виртуальный пользователь держит своё соединение
+keep-alive, выбирает сценарий по весу, выполняет запрос и делает паузу
+--wait. Пользователи запускаются постепенно за --ramp-up секунд, тест
+идёт --duration секунд. Адреса для сценариев берутся из самого API.
+
+    gunicorn -c gunicorn.conf.py
+    python benchmarks/load.py http://127.0.0.1:8000 --users 50 \\
+        --duration 60 --output load.json
+"""
+import argparse
+import gzip
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+
+from common import summary, write_results
+
+# (имя, вес, функция адреса от примеров из API)
+SCENARIOS = (
+    ('titles-list', 10, lambda sample: '/api/v1/titles/'),
+    ('titles-page', 5, lambda sample: (
+        f'/api/v1/titles/?page={random.randint(1, sample["pages"])}'
+    )),
+    ('titles-filter-genre', 3, lambda sample: (
+        f'/api/v1/titles/?genre={quote(random.choice(sample["genres"]))}'
+    )),
+    ('titles-detail', 8, lambda sample: (
+        f'/api/v1/titles/{random.choice(sample["titles"])}/'
+    )),
+    ('reviews-list', 8, lambda sample: (
+        f'/api/v1/titles/{random.choice(sample["titles"])}/reviews/'
+    )),
+    ('comments-list', 4, lambda sample: (
+        '/api/v1/titles/{}/reviews/{}/comments/'.format(
+            *random.choice(sample['reviews'])
+        )
+    )),
+    ('titles-top', 2, lambda sample: '/api/v1/titles/top/'),
+    ('genres-list', 1, lambda sample: '/api/v1/genres/'),
+)
+
+
+class Connection:
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        connection_class = (http.client.HTTPSConnection
+                            if parts.scheme == 'https'
+                            else http.client.HTTPConnection)
+        self.connection = connection_class(parts.netloc, timeout=timeout)
+
+    def get(self, path):
+        """(статус, тело); при обрыве соединение открывается заново."""
+        for attempt in range(2):
+            try:
+                self.connection.request('GET', path, headers={
+                    'Accept': 'application/json',
+                    'Accept-Encoding': 'gzip',
+                })
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError,
+                    ConnectionResetError):
+                self.connection.close()
+                if attempt:
+                    raise
+        return None
+
+
+def get_json(connection, path):
+    status, body = connection.get(path)
+    if status != 200:
+        sys.exit(f'{path}: ответ {status}')
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def discover(url, timeout):
+    """Примеры произведений, жанров и отзывов для сценариев."""
+    connection = Connection(url, timeout)
+    titles = get_json(connection, '/api/v1/titles/?fields=id')
+    title_ids = [item['id'] for item in titles['results']]
+    genres = get_json(connection, '/api/v1/genres/')
+    reviews = []
+    for title_id in title_ids[:10]:
+        page = get_json(connection,
+                        f'/api/v1/titles/{title_id}/reviews/?fields=id')
+        reviews.extend((title_id, item['id']) for item in page['results'])
+    page_size = len(titles['results']) or 1
+    return {
+        'titles': title_ids,
+        'pages': max(1, -(-titles['count'] // page_size)),
+        'genres': [item['slug'] for item in genres['results']] or [''],
+        'reviews': reviews or [(title_ids[0], 0)],
+    }
+
+
+def user(url, sample, args, deadline, timings, errors, lock):
+    connection = Connection(url, args.timeout)
+    names = [name for name, _, _ in SCENARIOS]
+    weights = [weight for _, weight, _ in SCENARIOS]
+    paths = {name: make_path for name, _, make_path in SCENARIOS}
+    while time.monotonic() < deadline:
+        name, = random.choices(names, weights)
+        started = time.perf_counter()
+        try:
+            status, _ = connection.get(paths[name](sample))
+        except OSError:
+            status = None
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            if status == 200:
+                timings[name].append(elapsed)
+            else:
+                errors[name] += 1
+        time.sleep(random.uniform(*args.wait))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('url', help='Адрес сервера, например '
+                                    'http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--ramp-up', type=float, default=5)
+    parser.add_argument('--wait', type=float, nargs=2, default=(0.1, 0.5),
+                        metavar=('MIN', 'MAX'),
+                        help='Пауза пользователя между запросами, с')
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    sample = discover(args.url, args.timeout)
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + args.ramp_up + args.duration
+    threads = []
+    for _ in range(args.users):
+        thread = threading.Thread(
+            target=user, daemon=True,
+            args=(args.url, sample, args, deadline, timings, errors, lock),
+        )
+        thread.start()
+        threads.append(thread)
+        time.sleep(args.ramp_up / args.users)
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    results = {}
+    for name, _, _ in SCENARIOS:
+        if not timings[name] and not errors[name]:
+            continue
+        results[name] = {
+            'errors': errors[name],
+            'rps': round(len(timings[name]) / elapsed, 2),
+            **(summary(timings[name]) if timings[name] else {}),
+        }
+        print(f'{name}: {results[name]}', file=sys.stderr)
+    total = sum(len(items) for items in timings.values())
+    print(f'Всего: {total} запросов, {total / elapsed:.1f} запросов/с, '
+          f'ошибок {sum(errors.values())}', file=sys.stderr)
+    params = {key: value for key, value in vars(args).items()
+              if key != 'output'}
+    write_results(args.output, 'load', params, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Задержка быстрых запросов, пока сервер занят медленными клиентами.
+
+Скрипт открывает --slow соединений, которые отправляют запрос по одному
+байту с паузой и так же медленно читают ответ, и параллельно измеряет
+время ответа обычных запросов к тому же адресу. Сравнение режимов -
+два запуска против одного и того же приложения:
+
+    GUNICORN_WORKERS=4 gunicorn -c gunicorn.conf.py
+    python benchmarks/slow_clients.py http://127.0.0.1:8000/api/v1/titles/
+
+    GUNICORN_WORKERS=4 GUNICORN_APP=api_yamdb.asgi:application \\
+        GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \\
+        gunicorn -c gunicorn.conf.py
+    python benchmarks/slow_clients.py http://127.0.0.1:8000/api/v1/titles/
+
+Запускать нужно напрямую против gunicorn: nginx сам буферизует
+медленных клиентов и скрывает разницу между режимами.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from common import percentile
+
+
+def build_request(url):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    return (f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+            f'Connection: close\r\n\r\n').encode()
+
+
+async def slow_client(url, delay, stop):
+    parts = urlsplit(url)
+    while not stop.is_set():
+        try:
+            reader, writer = await asyncio.open_connection(
+                parts.hostname, parts.port or 80
+            )
+        except OSError:
+            await asyncio.sleep(delay)
+            continue
+        try:
+            for byte in build_request(url):
+                writer.write(bytes([byte]))
+                await writer.drain()
+                await asyncio.sleep(delay)
+            while not stop.is_set() and await reader.read(64):
+                await asyncio.sleep(delay)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+async def fast_request(url, timeout):
+    parts = urlsplit(url)
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            parts.hostname, parts.port or 80
+        ), timeout)
+        writer.write(build_request(url))
+        status = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+    except (OSError, asyncio.TimeoutError):
+        return None
+    if b' 200 ' not in status:
+        return None
+    return (time.perf_counter() - started) * 1000
+
+
+async def run(url, slow, delay, requests, concurrency, timeout):
+    stop = asyncio.Event()
+    slow_tasks = [asyncio.ensure_future(slow_client(url, delay, stop))
+                  for _ in range(slow)]
+    await asyncio.sleep(delay * 5)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def measured():
+        async with semaphore:
+            return await fast_request(url, timeout)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(measured() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for task in slow_tasks:
+        task.cancel()
+    await asyncio.gather(*slow_tasks, return_exceptions=True)
+    return [result for result in results if result is not None], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('url')
+    parser.add_argument('--slow', type=int, default=50,
+                        help='Количество медленных клиентов')
+    parser.add_argument('--delay', type=float, default=0.2,
+                        help='Пауза медленного клиента между байтами, с')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=10)
+    args = parser.parse_args()
+
+    timings, elapsed = asyncio.run(run(
+        args.url, args.slow, args.delay, args.requests,
+        args.concurrency, args.timeout
+    ))
+    print(f'Успешно: {len(timings)} из {args.requests}, '
+          f'{len(timings) / elapsed:.1f} запросов/с')
+    if timings:
+        timings.sort()
+        print(f'Медиана: {statistics.median(timings):.1f} мс, '
+              f'p95: {percentile(timings, 95):.1f} мс, '
+              f'p99: {percentile(timings, 99):.1f} мс')
+
+
+if __name__ == '__main__':
+    main()
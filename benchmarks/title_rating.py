@@ -0,0 +1,109 @@
+"""Замер времени ответа /api/v1/titles/ до и после хранения рейтинга.
+
+Скрипт разворачивает отдельную базу SQLite, наполняет её синтетическими
+отзывами и сравнивает список произведений с агрегацией
+Avg("review__score") на каждый запрос и с чтением сохранённого рейтинга.
+
+    python benchmarks/title_rating.py --reviews 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api_yamdb'))
+
+
+def setup_django(db_name):
+    os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+    os.environ['DB_NAME'] = db_name
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def populate(reviews_total, titles_total, batch_size=10000):
+    from reviews.models import Category, Review, Title
+    from users.models import User
+
+    category = Category.objects.create(name='Фильмы', slug='movies')
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i:06d}', year=2000 + i % 20,
+              description='', category=category)
+        for i in range(titles_total)
+    )
+    users_total = -(-reviews_total // titles_total)
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(users_total)
+    )
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    batch = []
+    created = 0
+    for user_id in user_ids:
+        for title_id in title_ids:
+            if created == reviews_total:
+                break
+            batch.append(Review(author_id=user_id, title_id=title_id,
+                                text='Отзыв', score=random.randint(1, 10)))
+            created += 1
+            if len(batch) == batch_size:
+                Review.objects.bulk_create(batch)
+                batch = []
+    Review.objects.bulk_create(batch)
+    Title.objects.recalculate_rating()
+
+
+def measure(client, repeat):
+    timings = []
+    for page in range(1, repeat + 1):
+        started = time.perf_counter()
+        response = client.get('/api/v1/titles/', {'page': page})
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    return timings
+
+
+def report(label, timings):
+    print(f'{label:<24} median {statistics.median(timings):9.2f} ms   '
+          f'p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:9.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        setup_django(os.path.join(tmp_dir, 'bench.sqlite3'))
+        from api.views import TitleViewSet
+        from django.db.models import Avg
+        from rest_framework.test import APIClient
+        from reviews.models import Title
+
+        started = time.perf_counter()
+        populate(args.reviews, args.titles)
+        print(f'{args.reviews} отзывов на {args.titles} произведений '
+              f'загружены за {time.perf_counter() - started:.1f} с')
+
+        client = APIClient()
+        stored_queryset = TitleViewSet.queryset
+        TitleViewSet.queryset = Title.objects.annotate(
+            avg_rating=Avg('review__score')
+        ).order_by('name')
+        report('Avg("review__score")', measure(client, args.repeat))
+        TitleViewSet.queryset = stored_queryset
+        report('сохранённый рейтинг', measure(client, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import pytest
+from api.search import get_search_backend
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    backend = get_search_backend()
+    if hasattr(backend, 'reset'):
+        backend.reset()
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='TestAdmin', email='admin@yamdb.fake', role='admin'
+    )
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create(
+        username='TestUser', email='user@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def admin_client(admin):
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильмы', slug='movies')
+
+
+@pytest.fixture
+def genres():
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def make_titles(category, genres):
+    def make_titles(count):
+        titles = []
+        for number in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000,
+                description='Описание', category=category
+            )
+            title.genre.set(genres)
+            titles.append(title)
+        return titles
+
+    return make_titles
+
+
+@pytest.fixture
+def make_reviews(django_user_model):
+    def make_reviews(title, count):
+        reviews = []
+        start = title.review.count()
+        for number in range(start, start + count):
+            author = django_user_model.objects.create(
+                username=f'reviewer{title.pk}_{number}',
+                email=f'reviewer{title.pk}_{number}@yamdb.fake'
+            )
+            reviews.append(Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            ))
+        return reviews
+
+    return make_reviews
+
+
+@pytest.fixture
+def make_comments():
+    def make_comments(review, count):
+        return [
+            Comment.objects.create(
+                review=review, author=review.author, text='Комментарий'
+            )
+            for _ in range(count)
+        ]
+
+    return make_comments
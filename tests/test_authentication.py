@@ -0,0 +1,58 @@
+import pytest
+from api.cache import get_cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def users_queries(context):
+    return [query['sql'] for query in context.captured_queries
+            if 'users_user' in query['sql']]
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+
+    @pytest.fixture
+    def token_client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        return client
+
+    def test_snapshot_skips_users_table(self, token_client, make_titles):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert token_client.get(url).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            assert token_client.get(url).status_code == 200
+        assert users_queries(context) == []
+
+    def test_role_change_applies_immediately(self, token_client, user):
+        assert token_client.get('/api/v1/users/').status_code == 403
+        user.role = 'admin'
+        user.save()
+        assert token_client.get('/api/v1/users/').status_code == 200
+
+    def test_snapshot_expires_with_local_cache(self, token_client, user,
+                                               settings, monkeypatch):
+        assert settings.CACHE_IS_LOCAL and settings.USER_CACHE_TIMEOUT <= 5
+        stored = {}
+        monkeypatch.setattr(
+            get_cache(), 'set',
+            lambda key, value, timeout: stored.update({key: timeout})
+        )
+        token_client.get('/api/v1/users/me/')
+        assert list(stored.values()) == [settings.USER_CACHE_TIMEOUT]
+
+    def test_inactive_user_rejected(self, token_client, user):
+        assert token_client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert token_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_me_returns_full_profile(self, token_client, user):
+        response = token_client.get('/api/v1/users/me/')
+        assert response.json()['email'] == user.email
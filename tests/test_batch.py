@@ -0,0 +1,162 @@
+import pytest
+from api.views import ReviewBatchViewSet
+from django.db.models import QuerySet
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestBatch:
+
+    def test_create_titles(self, admin_client, category, genres):
+        response = admin_client.post('/api/v1/titles/batch/', [
+            {'name': 'Первое', 'year': 2001, 'description': 'Описание',
+             'category': 'movies', 'genre': ['drama', 'comedy']},
+            {'name': 'Второе', 'year': 2002, 'description': 'Описание',
+             'category': 'movies', 'genre': ['unknown']},
+            {'year': 2003},
+            {'name': 'Без связей', 'year': 2004, 'description': 'Описание'},
+        ], format='json')
+        assert response.status_code == 200
+        first, second, third, fourth = response.json()
+        assert first['status'] == 201
+        assert [item['status'] for item in (second, third, fourth)] == [
+            400, 400, 400
+        ]
+        assert 'genre' in second['errors']
+        assert 'name' in third['errors']
+        # Как и при создании по одному, категория и жанры обязательны
+        assert set(fourth['errors']) == {'category', 'genre'}
+        single = admin_client.post('/api/v1/titles/', {
+            'name': 'Без связей', 'year': 2004, 'description': 'Описание',
+        }, format='json')
+        assert single.status_code == 400
+        assert set(single.json()) == {'category', 'genre'}
+        title = Title.objects.get(pk=first['id'])
+        assert title.category == category
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+
+    def test_create_titles_admin_only(self, user_client):
+        response = user_client.post('/api/v1/titles/batch/', [
+            {'name': 'Первое', 'year': 2001},
+        ], format='json')
+        assert response.status_code == 403
+
+    def test_create_reviews(self, user_client, user, make_titles,
+                            make_reviews):
+        first, second = make_titles(2)
+        make_reviews(first, 1)
+        Title.objects.recalculate_rating()
+        response = user_client.post('/api/v1/batch/reviews/', [
+            {'title': first.pk, 'text': 'Хорошо', 'score': 7},
+            {'title': first.pk, 'text': 'Повтор', 'score': 1},
+            {'title': second.pk, 'text': 'Плохо', 'score': 11},
+            {'title': 100500, 'text': 'Нет', 'score': 3},
+        ], format='json')
+        assert response.status_code == 200
+        assert [item['status'] for item in response.json()] == [
+            201, 400, 400, 404
+        ]
+        first.refresh_from_db()
+        assert (first.rating_sum, first.rating_count, first.rating) == (
+            12, 2, 6
+        )
+        assert Review.objects.filter(author=user).count() == 1
+
+    def test_create_reviews_concurrent_duplicate(self, user_client, user,
+                                                 make_titles, monkeypatch):
+        first, second = make_titles(2)
+        insert = ReviewBatchViewSet.insert
+
+        def create_then_insert(reviews):
+            # Другой запрос того же автора создаёт отзыв после проверки
+            # пакета на повторы, но до вставки
+            monkeypatch.setattr(ReviewBatchViewSet, 'insert',
+                                staticmethod(insert))
+            Review.objects.create(title=first, author=user, text='Раньше',
+                                  score=2)
+            insert(reviews)
+
+        monkeypatch.setattr(ReviewBatchViewSet, 'insert',
+                            staticmethod(create_then_insert))
+        response = user_client.post('/api/v1/batch/reviews/', [
+            {'title': first.pk, 'text': 'Хорошо', 'score': 7},
+            {'title': second.pk, 'text': 'Плохо', 'score': 3},
+        ], format='json')
+        assert response.status_code == 200
+        assert [item['status'] for item in response.json()] == [400, 201]
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.rating_sum, first.rating_count) == (2, 1)
+        assert (second.rating_sum, second.rating_count) == (3, 1)
+
+    def test_delete_reviews(self, user_client, admin_client, user,
+                            make_titles, make_reviews):
+        title, = make_titles(1)
+        foreign, = make_reviews(title, 1)
+        own = Review.objects.create(title=title, author=user,
+                                    text='Отзыв', score=9)
+        Title.objects.recalculate_rating()
+        response = user_client.post('/api/v1/batch/reviews/delete/', {
+            'ids': [own.pk, foreign.pk, 100500],
+        }, format='json')
+        assert [item['status'] for item in response.json()] == [
+            204, 403, 404
+        ]
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating) == (1, 5)
+
+        response = admin_client.post('/api/v1/batch/reviews/delete/', {
+            'ids': [foreign.pk],
+        }, format='json')
+        assert response.json()[0]['status'] == 204
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating) == (0, None)
+
+    def test_delete_reviews_removed_concurrently(self, admin_client,
+                                                 make_titles, make_reviews,
+                                                 monkeypatch):
+        title, = make_titles(1)
+        first, second, third = make_reviews(title, 3)
+        Title.objects.recalculate_rating()
+        in_bulk = QuerySet.in_bulk
+
+        def in_bulk_then_delete(queryset, *args, **kwargs):
+            # Другой запрос удаляет отзыв сразу после чтения пакета
+            reviews = in_bulk(queryset, *args, **kwargs)
+            first.delete()
+            return reviews
+
+        monkeypatch.setattr(QuerySet, 'in_bulk', in_bulk_then_delete)
+        response = admin_client.post('/api/v1/batch/reviews/delete/', {
+            'ids': [first.pk, second.pk],
+        }, format='json')
+        assert response.status_code == 200
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            third.score, 1, third.score
+        )
+
+    def test_delete_comments(self, admin_client, user_client, make_titles,
+                             make_reviews, make_comments):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        comments = make_comments(review, 2)
+        ids = [comment.pk for comment in comments]
+        response = user_client.post('/api/v1/batch/comments/delete/', {
+            'ids': ids,
+        }, format='json')
+        assert response.status_code == 403
+        response = admin_client.post('/api/v1/batch/comments/delete/', {
+            'ids': ids + [100500],
+        }, format='json')
+        assert [item['status'] for item in response.json()] == [
+            204, 204, 404
+        ]
+        assert not Comment.objects.exists()
+
+    def test_empty_batch(self, user_client):
+        response = user_client.post('/api/v1/batch/reviews/', [],
+                                    format='json')
+        assert response.status_code == 400
@@ -0,0 +1,57 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_list_is_served_from_cache(self, client, make_titles,
+                                                django_assert_num_queries):
+        make_titles(2)
+        client.get('/api/v1/titles/')
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 2
+
+    def test_review_invalidates_title(self, client, user_client,
+                                      make_titles):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.pk}/'
+
+        def ratings():
+            listed, = client.get('/api/v1/titles/').json()['results']
+            return client.get(url).json()['rating'], listed['rating']
+
+        assert ratings() == (None, None)
+        # Рейтинг меняется UPDATE без сохранения Title, кэш сбрасывает
+        # сигнал отзыва
+        response = user_client.post(f'{url}reviews/',
+                                    {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        assert ratings() == (7, 7)
+        response = user_client.delete(
+            f'{url}reviews/{response.json()["id"]}/'
+        )
+        assert response.status_code == 204
+        assert ratings() == (None, None)
+
+    def test_genre_change_invalidates_titles(self, client, make_titles,
+                                             genres):
+        make_titles(1)
+        client.get('/api/v1/titles/')
+        genres[0].name = 'Трагедия'
+        genres[0].save()
+        names = {
+            genre['name']
+            for genre in client.get('/api/v1/titles/').json()[
+                'results'][0]['genre']
+        }
+        assert 'Трагедия' in names
+
+    def test_stats_for_admin_only(self, client, admin_client):
+        assert client.get('/api/v1/cache/stats/').status_code == 401
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        assert response.json()['genres'] == {'hits': 1, 'misses': 1}
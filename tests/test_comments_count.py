@@ -0,0 +1,125 @@
+import pytest
+from reviews.models import Comment, Review
+
+
+@pytest.mark.django_db
+class TestCommentsCount:
+
+    def reviews_url(self, review):
+        return f'/api/v1/titles/{review.title_id}/reviews/'
+
+    def comments_url(self, review):
+        return f'{self.reviews_url(review)}{review.pk}/comments/'
+
+    def comments_count(self, review):
+        return Review.objects.values_list(
+            'comments_count', flat=True
+        ).get(pk=review.pk)
+
+    def test_create_and_delete(self, user_client, make_titles, make_reviews):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        for text in ('Первый', 'Второй'):
+            response = user_client.post(self.comments_url(review),
+                                        {'text': text})
+            assert response.status_code == 201
+        assert self.comments_count(review) == 2
+        comment_id = response.json()['id']
+        response = user_client.delete(
+            f'{self.comments_url(review)}{comment_id}/'
+        )
+        assert response.status_code == 204
+        assert self.comments_count(review) == 1
+        response = user_client.get(f'{self.reviews_url(review)}{review.pk}/')
+        assert response.json()['comments_count'] == 1
+
+    def test_batch_delete(self, admin_client, make_titles, make_reviews,
+                          make_comments):
+        title, = make_titles(1)
+        first, second = make_reviews(title, 2)
+        comments = make_comments(first, 2) + make_comments(second, 3)
+        response = admin_client.post('/api/v1/batch/comments/delete/', {
+            'ids': [comments[0].pk, comments[2].pk, comments[3].pk, 100500]
+        }, format='json')
+        assert response.status_code == 200
+        assert self.comments_count(first) == 1
+        assert self.comments_count(second) == 1
+
+    def test_author_deletion_removes_comments(self, admin_client, user,
+                                              user_client, make_titles,
+                                              make_reviews, make_comments):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, 1)
+        response = user_client.post(self.comments_url(review),
+                                    {'text': 'Удалится с автором'})
+        assert response.status_code == 201
+        assert self.comments_count(review) == 2
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert self.comments_count(review) == 1
+        assert review.comments.count() == 1
+
+    def test_model_writes_keep_count(self, make_titles, make_reviews,
+                                     make_comments):
+        title, = make_titles(1)
+        first, second = make_reviews(title, 2)
+        comment, = make_comments(first, 1)
+        comment.text = 'Исправлен'
+        comment.save()
+        assert self.comments_count(first) == 1
+        comment.review = second
+        comment.save()
+        assert self.comments_count(first) == 0
+        assert self.comments_count(second) == 1
+        Comment.objects.filter(pk=comment.pk).delete()
+        assert self.comments_count(second) == 0
+
+    def test_recalculate(self, make_titles, make_reviews, make_comments):
+        title, = make_titles(1)
+        first, second = make_reviews(title, 2)
+        make_comments(first, 2)
+        Review.objects.update(comments_count=7)
+        Review.objects.recalculate_comments_count()
+        assert self.comments_count(first) == 2
+        assert self.comments_count(second) == 0
+
+    def test_list_etag_changes(self, user_client, make_titles, make_reviews):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        etag = user_client.get(self.reviews_url(review))['ETag']
+        user_client.post(self.comments_url(review), {'text': 'Новый'})
+        assert user_client.get(self.reviews_url(review))['ETag'] != etag
+
+    def test_latest_comments(self, client, make_titles, make_reviews,
+                             make_comments, settings):
+        settings.REVIEW_LATEST_COMMENTS = 2
+        title, = make_titles(1)
+        first, second = make_reviews(title, 2)
+        comments = make_comments(first, 3)
+        response = client.get(self.reviews_url(first),
+                              {'expand': 'latest_comments'})
+        assert response.status_code == 200
+        previews = {
+            item['id']: item['latest_comments']
+            for item in response.json()['results']
+        }
+        assert [item['id'] for item in previews[first.pk]] == [
+            comments[2].pk, comments[1].pk
+        ]
+        assert previews[second.pk] == []
+        assert set(previews[first.pk][0]) == {
+            'id', 'text', 'author', 'pub_date'
+        }
+
+    def test_latest_comments_only_on_request(self, client, make_titles,
+                                             make_reviews):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        item, = client.get(self.reviews_url(review)).json()['results']
+        assert 'latest_comments' not in item
+        assert item['comments_count'] == 0
+        item, = client.get(self.reviews_url(review), {
+            'fields': 'id', 'expand': 'latest_comments'
+        }).json()['results']
+        assert item == {'id': review.pk}
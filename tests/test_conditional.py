@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from api.pagination import KeysetPagination
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+
+    def test_reviews_list_not_modified(self, client, make_titles,
+                                       make_reviews):
+        title, = make_titles(1)
+        make_reviews(title, 2)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        make_reviews(title, 1)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_cursor_list_etag_reads_only_page_window(self, client,
+                                                     make_titles,
+                                                     make_reviews,
+                                                     monkeypatch):
+        monkeypatch.setattr(KeysetPagination, 'page_size', 2)
+        title, = make_titles(1)
+        oldest, *_, newest = make_reviews(title, 5)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        params = {'pagination': 'cursor'}
+        with CaptureQueriesContext(connection) as context:
+            etag = client.get(url, params)['ETag']
+        aggregate, = [query['sql'] for query in context.captured_queries
+                      if 'SUM(' in query['sql'].upper()]
+        assert re.search(r'LIMIT 3\b', aggregate)
+
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        # Изменение за пределами страницы ETag не меняет
+        Review.objects.filter(pk=oldest.pk).update(version=F('version') + 1)
+        assert client.get(url, params)['ETag'] == etag
+        Review.objects.filter(pk=newest.pk).update(version=F('version') + 1)
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    def test_title_detail_not_modified(self, client, make_titles):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.pk}/'
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_if_match_on_review_update(self, make_titles, make_reviews):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        client = APIClient()
+        client.force_authenticate(user=review.author)
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        etag = client.get(url)['ETag']
+
+        response = client.patch(url, {'text': 'Новый текст'},
+                                HTTP_IF_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+        response = client.patch(url, {'text': 'Устаревшая правка'},
+                                HTTP_IF_MATCH=etag)
+        assert response.status_code == 412
+        response = client.delete(url, HTTP_IF_MATCH=etag)
+        assert response.status_code == 412
@@ -0,0 +1,58 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from api_yamdb.db.base import DatabaseWrapper, _pools
+
+pytestmark = [
+    pytest.mark.skipif(connection.vendor != 'postgresql',
+                       reason='Движок api_yamdb.db работает с PostgreSQL'),
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture
+def make_wrapper(request):
+    wrappers = []
+
+    def make_wrapper(**options):
+        alias = f'{request.node.name}-{len(wrappers)}'
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, **options}, alias=alias
+        )
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield make_wrapper
+    for wrapper in wrappers:
+        wrapper.close()
+        pool = _pools.pop(wrapper.alias, None)
+        if pool is not None:
+            pool.closeall()
+
+
+def backend_pid(wrapper):
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+class TestDatabaseBackend:
+
+    def test_pool_reuses_connection(self, make_wrapper):
+        wrapper = make_wrapper(POOL_SIZE=1, CONN_MAX_AGE=0)
+        pid = backend_pid(wrapper)
+        wrapper.close()
+        assert backend_pid(wrapper) == pid
+
+    def test_pool_requires_closing_connections(self, make_wrapper):
+        with pytest.raises(ImproperlyConfigured, match='CONN_MAX_AGE=0'):
+            make_wrapper(POOL_SIZE=1, CONN_MAX_AGE=60)
+
+    def test_health_check_reconnects(self, make_wrapper):
+        wrapper = make_wrapper(CONN_MAX_AGE=60)
+        pid = backend_pid(wrapper)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        wrapper.close_if_unusable_or_obsolete()
+        assert backend_pid(wrapper) != pid
@@ -0,0 +1,40 @@
+import gzip
+import json
+
+import pytest
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_reviews_ndjson(self, admin_client, make_titles, make_reviews):
+        title, = make_titles(1)
+        reviews = make_reviews(title, 3)
+        response = admin_client.get('/api/v1/export/reviews/')
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line)
+                for line in self.read(response).decode().splitlines()]
+        assert [row['id'] for row in rows] == [r.pk for r in reviews]
+        assert rows[0]['author'] == reviews[0].author.username
+
+    def test_comments_csv_gzip_since(self, admin_client, make_titles,
+                                     make_reviews, make_comments):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        first, second = make_comments(review, 2)
+        response = admin_client.get('/api/v1/export/comments/', {
+            'type': 'csv', 'gzip': '1',
+            'since': first.pub_date.isoformat(),
+        })
+        assert response['Content-Type'] == 'application/gzip'
+        lines = gzip.decompress(self.read(response)).decode().splitlines()
+        assert lines[0] == 'id,title,review,author,text,pub_date'
+        assert [line.split(',')[0] for line in lines[1:]] == [str(second.pk)]
+
+    def test_admin_only(self, user_client):
+        response = user_client.get('/api/v1/export/reviews/')
+        assert response.status_code == 403
@@ -0,0 +1,43 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Max, Sum
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+SIZES = {'categories': 2, 'genres': 4, 'titles': 20, 'users': 15,
+         'reviews': 100, 'comments': 50}
+
+
+def generate(**options):
+    call_command('generate_fake_data', stdout=StringIO(),
+                 **{**SIZES, **options})
+
+
+@pytest.mark.django_db
+class TestGenerateFakeData:
+
+    def test_dataset(self):
+        generate()
+        assert Title.objects.count() == 20
+        assert User.objects.count() == 15
+        assert Comment.objects.count() == 50
+        reviews = Review.objects.count()
+        # Самое популярное произведение ограничено числом пользователей
+        assert 80 <= reviews <= 100
+        assert Title.objects.aggregate(
+            total=Sum('rating_count')
+        )['total'] == reviews
+        assert Title.objects.aggregate(
+            top=Max('rating_count')
+        )['top'] == 15
+        assert not Title.objects.filter(genre=None).exists()
+
+    def test_prefix_taken(self):
+        generate(titles=1, reviews=0, comments=0)
+        with pytest.raises(CommandError):
+            generate(titles=1, reviews=0, comments=0)
+        generate(titles=1, reviews=0, comments=0, prefix='more')
+        assert Title.objects.count() == 2
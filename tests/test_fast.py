@@ -0,0 +1,74 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.serializers import ModelSerializer
+from reviews.models import Title
+
+LIST_PARAMS = [
+    {},
+    {'fields': 'id,name,genre,category'},
+    {'fields': 'id,genre', 'expand': 'genre'},
+    {'fields': 'rating,year'},
+    {'pagination': 'cursor', 'page_size': 2},
+    {'search': 'Произведение'},
+]
+
+
+@pytest.fixture
+def fetch(client, settings, monkeypatch):
+    """Ответ на один и тот же запрос без быстрого пути и с ним."""
+    def fetch(url, params):
+        settings.API_FAST_SERIALIZERS = False
+        expected = client.get(url, params)
+        cache.clear()
+        settings.API_FAST_SERIALIZERS = True
+        with monkeypatch.context() as patch:
+            patch.setattr(ModelSerializer, 'to_representation', None)
+            response = client.get(url, params)
+        return expected, response
+
+    return fetch
+
+
+@pytest.mark.django_db
+class TestFastSerializers:
+
+    @pytest.mark.parametrize('params', LIST_PARAMS)
+    def test_titles_identical(self, fetch, make_titles, make_reviews, params):
+        titles = make_titles(3)
+        make_reviews(titles[0], 2)
+        Title.objects.recalculate_rating()
+        titles[1].genre.clear()
+        expected, response = fetch('/api/v1/titles/', params)
+        assert response.status_code == 200
+        assert response.content == expected.content
+
+    @pytest.mark.parametrize('params', [
+        {}, {'fields': 'author,pub_date'}, {'pagination': 'cursor'},
+    ])
+    def test_reviews_and_comments_identical(self, fetch, make_titles,
+                                            make_reviews, make_comments,
+                                            params):
+        title, = make_titles(1)
+        review, _ = make_reviews(title, 2)
+        make_comments(review, 3)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        for url in (reviews_url, f'{reviews_url}{review.pk}/comments/'):
+            expected, response = fetch(url, params)
+            assert response.status_code == 200
+            assert response.content == expected.content
+
+    def test_cursor_pages(self, fetch, make_titles):
+        make_titles(5)
+        expected, response = fetch('/api/v1/titles/',
+                                   {'pagination': 'cursor', 'page_size': 2})
+        next_url = response.json()['next']
+        assert next_url == expected.json()['next']
+        expected, response = fetch(next_url, {})
+        assert response.content == expected.content
+
+    def test_genres_in_one_query(self, client, make_titles,
+                                 django_assert_num_queries):
+        make_titles(5)
+        # ETag, страница, жанры страницы
+        with django_assert_num_queries(3):
+            client.get('/api/v1/titles/')
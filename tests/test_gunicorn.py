@@ -0,0 +1,41 @@
+import os
+import runpy
+
+import pytest
+from django.conf import settings
+
+CONFIG = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+MEMCACHED = 'django.core.cache.backends.memcached.MemcachedCache'
+
+
+def load_config(monkeypatch, **env):
+    for name in ('CACHE_BACKEND', 'GUNICORN_WORKERS'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONFIG)
+
+
+class TestGunicornConfig:
+
+    def test_single_worker_with_local_cache(self, monkeypatch):
+        assert load_config(monkeypatch)['workers'] == 1
+
+    def test_local_cache_refuses_several_workers(self, monkeypatch):
+        with pytest.raises(RuntimeError, match='общего кэша'):
+            load_config(monkeypatch, GUNICORN_WORKERS='3')
+
+    def test_shared_cache_allows_workers(self, monkeypatch):
+        config = load_config(monkeypatch, CACHE_BACKEND=MEMCACHED)
+        assert config['workers'] > 1
+        config = load_config(monkeypatch, CACHE_BACKEND=MEMCACHED,
+                             GUNICORN_WORKERS='4')
+        assert config['workers'] == 4
+
+    def test_compose_ships_shared_cache(self):
+        path = os.path.join(os.path.dirname(settings.BASE_DIR), 'infra',
+                            'docker-compose.yaml')
+        with open(path) as file:
+            compose = file.read()
+        assert 'image: memcached:' in compose
+        assert f'CACHE_BACKEND: {MEMCACHED}' in compose
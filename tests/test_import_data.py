@@ -0,0 +1,169 @@
+import csv
+import json
+from datetime import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def write_jsonl(path, rows):
+    with open(path, 'w', encoding='utf-8') as file:
+        for row in rows:
+            file.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return str(path)
+
+
+def import_data(kind, path, *args):
+    call_command('import_data', kind, path, *args, stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestImportData:
+
+    @pytest.fixture
+    def catalog(self, tmp_path):
+        import_data('category', write_csv(tmp_path / 'category.csv', [
+            {'id': 10, 'name': 'Фильмы', 'slug': 'movies'},
+        ]))
+        import_data('genre', write_jsonl(tmp_path / 'genre.jsonl', [
+            {'id': 20, 'name': 'Драма', 'slug': 'drama'},
+            {'id': 21, 'name': 'Комедия', 'slug': 'comedy'},
+        ]))
+        import_data('title', write_csv(tmp_path / 'title.csv', [
+            {'id': 30, 'name': 'Фильм', 'year': 2001,
+             'description': 'Описание', 'category': 'movies'},
+            {'id': 31, 'name': 'Без категории', 'year': 2002,
+             'description': '', 'category': ''},
+        ]))
+        import_data('genre_title', write_csv(tmp_path / 'genre_title.csv', [
+            {'title': 30, 'genre': 'drama'},
+            {'title': 30, 'genre': 'comedy'},
+        ]))
+        import_data('user', write_jsonl(tmp_path / 'user.jsonl', [
+            {'id': 40, 'username': 'first', 'email': 'first@yamdb.fake',
+             'role': 'user'},
+            {'id': 41, 'username': 'second', 'email': 'second@yamdb.fake',
+             'role': 'moderator', 'bio': 'О себе'},
+        ]))
+        import_data('review', write_jsonl(tmp_path / 'review.jsonl', [
+            {'id': 50, 'title': 30, 'author': 'first', 'text': 'Хорошо',
+             'score': 8, 'pub_date': '2020-01-02T03:04:05'},
+            {'id': 51, 'title': 30, 'author': 'second', 'text': 'Плохо',
+             'score': 3, 'pub_date': '2020-02-03T04:05:06'},
+        ]))
+        import_data('comment', write_csv(tmp_path / 'comment.csv', [
+            {'id': 60, 'review': 50, 'author': 'second', 'text': 'Да',
+             'pub_date': '2020-03-04T05:06:07'},
+            {'id': 61, 'review': 50, 'author': 'first', 'text': 'Нет',
+             'pub_date': ''},
+        ]))
+
+    def test_imports_every_kind(self, catalog):
+        title = Title.objects.get(pk=30)
+        assert title.category == Category.objects.get(pk=10)
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+        assert Title.objects.get(pk=31).category_id is None
+        assert User.objects.get(pk=41).role == 'moderator'
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            11, 2, 5
+        )
+        assert Title.objects.get(pk=31).rating is None
+        assert dict(Review.objects.values_list('pk', 'comments_count')) == {
+            50: 2, 51: 0
+        }
+        assert Review.objects.get(pk=50).pub_date == datetime(
+            2020, 1, 2, 3, 4, 5
+        )
+        assert Comment.objects.get(pk=60).pub_date == datetime(
+            2020, 3, 4, 5, 6, 7
+        )
+        assert Comment.objects.get(pk=61).pub_date is not None
+
+    def test_new_rows_after_import(self, catalog):
+        category = Category.objects.create(name='Книги', slug='books')
+        genre = Genre.objects.create(name='Поэзия', slug='poetry')
+        title = Title.objects.create(name='Книга', year=2003,
+                                     category=category)
+        user = User.objects.create(username='third',
+                                   email='third@yamdb.fake')
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=5)
+        comment = Comment.objects.create(review=review, author=user,
+                                         text='Комментарий')
+        assert category.pk > 10 and genre.pk > 21 and title.pk > 31
+        assert user.pk > 41 and review.pk > 51 and comment.pk > 61
+
+    def test_unknown_reference(self, tmp_path, catalog):
+        path = write_csv(tmp_path / 'title.csv', [
+            {'id': 32, 'name': 'Фильм', 'year': 2001, 'description': '',
+             'category': 'unknown'},
+        ])
+        with pytest.raises(CommandError, match='category «unknown»'):
+            import_data('title', path)
+        path = write_csv(tmp_path / 'review.csv', [
+            {'id': 52, 'title': 31, 'author': 'nobody', 'text': 'Отзыв',
+             'score': 5, 'pub_date': ''},
+        ])
+        with pytest.raises(CommandError, match='author «nobody»'):
+            import_data('review', path)
+
+    @pytest.mark.parametrize('column, value', [
+        ('score', 11),
+        ('score', 0),
+        ('score', 'десять'),
+        ('title', 'тридцать'),
+        ('pub_date', '2020-13-45'),
+    ])
+    def test_invalid_values(self, tmp_path, catalog, column, value):
+        row = {'id': 52, 'title': 31, 'author': 'first', 'text': 'Отзыв',
+               'score': 5, 'pub_date': ''}
+        path = write_csv(tmp_path / 'review.csv', [
+            {'id': 53, 'title': 31, 'author': 'second', 'text': 'Отзыв',
+             'score': 5, 'pub_date': ''},
+            {**row, column: value},
+        ])
+        with pytest.raises(CommandError, match=f'review.csv, запись 2, '
+                                               f'{column}: '):
+            import_data('review', path)
+        assert not Review.objects.filter(title_id=31).exists()
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(CommandError, match='не найден'):
+            import_data('genre', str(tmp_path / 'genre.csv'))
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        rows = [{'id': number, 'name': f'Жанр {number}',
+                 'slug': f'genre-{number}'} for number in range(1, 6)]
+        rows[3]['slug'] = 'genre-1'
+        path = write_jsonl(tmp_path / 'genre.jsonl', rows)
+        with pytest.raises(IntegrityError):
+            import_data('genre', path, '--batch-size', '2')
+        with open(f'{path}.checkpoint') as file:
+            assert json.load(file) == {'rows': 2}
+        assert Genre.objects.count() == 2
+
+        # Уже загруженные строки пропускаются, а дубликаты из
+        # прерванного блока не мешают продолжению
+        rows[3]['slug'] = 'genre-4'
+        Genre.objects.create(id=3, name='Жанр 3', slug='genre-3')
+        write_jsonl(tmp_path / 'genre.jsonl', rows)
+        import_data('genre', path, '--batch-size', '2', '--resume')
+        assert list(Genre.objects.values_list('pk', flat=True)) == [
+            1, 2, 3, 4, 5
+        ]
+        assert not (tmp_path / 'genre.jsonl.checkpoint').exists()
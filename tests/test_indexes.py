@@ -0,0 +1,31 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+
+@pytest.mark.django_db
+class TestIndexes:
+
+    def test_genre_title_index(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, 'reviews_title_genre'
+            )
+        index = constraints['title_genre_genre_title_idx']
+        assert index['columns'] == ['genre_id', 'title_id']
+
+    def test_explain_queries(self, make_titles, make_reviews, make_comments):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, 1)
+        out = StringIO()
+        call_command('explain_queries', '-v2', stdout=out)
+        output = out.getvalue()
+        assert '/api/v1/titles/?genre=' in output
+        assert f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/' in (
+            output
+        )
+        assert 'SELECT' in output
+        assert 'Запросов с последовательным чтением' in output
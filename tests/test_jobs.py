@@ -0,0 +1,127 @@
+import smtplib
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.utils import timezone
+from jobs import queue
+from jobs.models import Job
+
+
+@pytest.mark.django_db
+class TestJobs:
+
+    def signup(self, client, username='newbie'):
+        return client.post('/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake',
+        })
+
+    def test_signup_enqueues_mail(self, client):
+        response = self.signup(client)
+        assert response.status_code == 200
+        assert mail.outbox == []
+        job = Job.objects.get()
+        assert (job.name, job.status) == ('send_mail', Job.PENDING)
+
+        call_command('run_worker', '--once')
+        job.refresh_from_db()
+        assert job.status == Job.DONE
+        assert mail.outbox[0].to == ['newbie@yamdb.fake']
+
+    def test_eager_mode(self, client, settings):
+        settings.JOBS_EAGER = True
+        self.signup(client)
+        assert not Job.objects.exists()
+        assert len(mail.outbox) == 1
+
+    def test_mail_sent_in_batches(self, client, monkeypatch):
+        connections = []
+        original = queue._handlers['send_mail']
+
+        def send_mail(payloads):
+            connections.append(len(payloads))
+            return original(payloads)
+
+        monkeypatch.setitem(queue._handlers, 'send_mail', send_mail)
+        for number in range(3):
+            self.signup(client, f'newbie{number}')
+        call_command('run_worker', '--once')
+        assert connections == [3]
+        assert len(mail.outbox) == 3
+
+    def test_failed_message_retried_alone(self, client, monkeypatch):
+        send = EmailMessage.send
+
+        def send_or_fail(message, *args, **kwargs):
+            if message.to == ['newbie1@yamdb.fake']:
+                raise ValueError('Неверный заголовок')
+            return send(message, *args, **kwargs)
+
+        monkeypatch.setattr(EmailMessage, 'send', send_or_fail)
+        for number in range(3):
+            self.signup(client, f'newbie{number}')
+        assert queue.run_pending(10) == (3, 2)
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'newbie0@yamdb.fake', 'newbie2@yamdb.fake'
+        ]
+        failed = Job.objects.get(status=Job.PENDING)
+        assert 'Неверный заголовок' in failed.last_error
+
+        monkeypatch.setattr(EmailMessage, 'send', send)
+        Job.objects.update(run_at=timezone.now())
+        assert queue.run_pending(10) == (1, 1)
+        assert len(mail.outbox) == 3
+
+    def test_worker_purges_old_done_jobs(self, settings):
+        settings.JOBS_DONE_RETENTION_DAYS = 7
+        old = timezone.now() - timedelta(days=8)
+        for status in (Job.DONE, Job.FAILED):
+            Job.objects.create(name='send_mail', payload='{}',
+                               status=status, run_at=old)
+        recent = Job.objects.create(name='send_mail', payload='{}',
+                                    status=Job.DONE)
+        call_command('run_worker', '--once', stdout=StringIO())
+        assert set(Job.objects.values_list('status', flat=True)) == {
+            Job.DONE, Job.FAILED
+        }
+        assert Job.objects.filter(status=Job.DONE).get() == recent
+
+    def test_retry_with_backoff(self, client, settings, monkeypatch):
+        settings.JOBS_MAX_ATTEMPTS = 2
+        monkeypatch.setitem(
+            queue._handlers, 'send_mail',
+            lambda payloads: [smtplib.SMTPException('down')] * len(payloads)
+        )
+        self.signup(client)
+        queue.run_pending(10)
+        job = Job.objects.get()
+        assert (job.status, job.attempts) == (Job.PENDING, 1)
+        assert queue.run_pending(10) == (0, 0)
+
+        Job.objects.update(run_at=job.created)
+        queue.run_pending(10)
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.FAILED, 2)
+        assert 'down' in job.last_error
+
+    def test_stale_jobs_count_as_attempts(self, settings):
+        settings.JOBS_MAX_ATTEMPTS = 2
+        locked_at = timezone.now() - timedelta(
+            seconds=settings.JOBS_LOCK_TIMEOUT + 1
+        )
+        job = Job.objects.create(name='send_mail', payload='{}',
+                                 status=Job.RUNNING, locked_at=locked_at)
+        assert queue.run_pending(10) == (0, 0)
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.PENDING, 1)
+        assert job.run_at > timezone.now()
+        assert 'TimeoutError' in job.last_error
+
+        # Воркер снова упал на этой задаче: попытки исчерпаны
+        Job.objects.update(status=Job.RUNNING, locked_at=locked_at)
+        assert queue.run_pending(10) == (0, 0)
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.FAILED, 2)
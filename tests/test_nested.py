@@ -0,0 +1,53 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestNestedRoutes:
+
+    def test_missing_parent(self, client, make_titles, make_reviews):
+        title, other = make_titles(2)
+        review, = make_reviews(title, 1)
+        urls = [
+            '/api/v1/titles/100500/reviews/',
+            f'/api/v1/titles/{other.pk}/reviews/{review.pk}/',
+            f'/api/v1/titles/{other.pk}/reviews/{review.pk}/comments/',
+            f'/api/v1/titles/{title.pk}/reviews/100500/comments/',
+        ]
+        for url in urls:
+            assert client.get(url).status_code == 404, url
+        response = client.get(f'/api/v1/titles/{other.pk}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['results'] == []
+
+    def test_create_in_missing_parent(self, user_client, make_titles,
+                                      make_reviews):
+        title, other = make_titles(2)
+        review, = make_reviews(title, 1)
+        response = user_client.post('/api/v1/titles/100500/reviews/',
+                                    {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 404
+        response = user_client.post(
+            f'/api/v1/titles/{other.pk}/reviews/{review.pk}/comments/',
+            {'text': 'Комментарий'}
+        )
+        assert response.status_code == 404
+
+    def test_duplicate_review(self, user_client, user, make_titles):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        assert not any(
+            query['sql'].startswith('SELECT') and 'reviews_review' in
+            query['sql'] for query in context.captured_queries
+        ), 'Уникальность отзыва проверяет ограничение базы'
+        response = user_client.post(url, {'text': 'Ещё', 'score': 1})
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.json()
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating_sum) == (1, 5)
+        assert Review.objects.filter(author=user).count() == 1
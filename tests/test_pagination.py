@@ -0,0 +1,58 @@
+import json
+from base64 import urlsafe_b64encode
+
+import pytest
+from api.pagination import KeysetPagination
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_page_number_is_default(self, client, make_titles):
+        make_titles(3)
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert set(response.json()) == {'count', 'next', 'previous',
+                                        'results'}
+
+    def test_cursor_walks_all_reviews(self, client, make_titles,
+                                      make_reviews, monkeypatch):
+        monkeypatch.setattr(KeysetPagination, 'page_size', 4)
+        title, = make_titles(1)
+        reviews = make_reviews(title, 10)
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        seen = []
+        pages = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data
+            seen.extend(review['id'] for review in data['results'])
+            pages.append(data)
+            url = data['next']
+        assert seen == sorted((review.pk for review in reviews),
+                              reverse=True)
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results']
+
+    def test_cursor_mode_from_accept_header(self, client, make_titles):
+        make_titles(3)
+        response = client.get(
+            '/api/v1/titles/',
+            HTTP_ACCEPT='application/json; pagination=cursor'
+        )
+        assert response.status_code == 200
+        assert 'count' not in response.json()
+
+    @pytest.mark.parametrize('payload', [
+        {'p': [None, None], 'r': 0},
+        {'p': [['Произведение'], {'id': 1}], 'r': 0},
+        {'p': [1, 1], 'r': 0},
+        {'p': ['Произведение'], 'r': 0},
+    ])
+    def test_invalid_cursor(self, client, make_titles, payload):
+        make_titles(1)
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
+        cursor = urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        response = client.get('/api/v1/titles/', {'cursor': cursor})
+        assert response.status_code == 404
@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+from api.perf import RequestStats, metric_key
+from django.core.cache import caches
+
+
+def test_duplicate_queries():
+    stats = RequestStats()
+    for params in ([1], [1], [2], [1]):
+        stats.add_query('SELECT 1 WHERE id = %s', params, 0.001)
+    assert stats.queries == 4
+    assert stats.duplicates == 2
+
+
+@pytest.mark.django_db
+class TestPerfMiddleware:
+
+    def test_server_timing_opt_in(self, client, settings, make_titles):
+        make_titles(2)
+        assert 'Server-Timing' not in client.get('/api/v1/genres/')
+        settings.PERF_SERVER_TIMING = True
+        header = client.get('/api/v1/titles/')['Server-Timing']
+        assert header.startswith('db;dur=')
+        assert '3 queries, 0 duplicate' in header
+        assert 'serialize;dur=' in header
+        assert 'view;dur=' in header
+
+    def test_log_line(self, client, caplog, make_titles):
+        title, = make_titles(1)
+        with caplog.at_level(logging.INFO, logger='api.perf'):
+            client.get(f'/api/v1/titles/{title.pk}/')
+        message = caplog.records[-1].getMessage()
+        assert 'route=titles-detail status=200' in message
+        assert 'serialize_ms=' in message
+
+    def test_metrics(self, client, admin_client, make_titles):
+        make_titles(1)
+        # Второй ответ берётся из кэша без запросов к базе
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert client.get('/api/v1/metrics/').status_code == 401
+        response = admin_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        lines = response.content.decode().splitlines()
+        assert ('api_request_duration_seconds_bucket'
+                '{route="titles-list",le="+Inf"} 2') in lines
+        assert ('api_request_duration_seconds_count'
+                '{route="titles-list"} 2') in lines
+        assert 'api_request_db_queries_total{route="titles-list"} 3' in lines
+
+    def test_metrics_use_own_cache(self, client, settings):
+        client.get('/api/v1/genres/')
+        key = metric_key('genres-list', 'seconds_sum')
+        assert caches[settings.PERF_CACHE_ALIAS].get(key) is not None
+        # Счётчики не вытесняют ответы, окна ограничений и снимки
+        assert caches[settings.API_CACHE_ALIAS].get(key) is None
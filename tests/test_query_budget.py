@@ -0,0 +1,89 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает код 200'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    def assert_budget(self, client, url, budget, grow):
+        small = count_queries(client, url)
+        grow()
+        large = count_queries(client, url)
+        assert small == large, (
+            f'Количество SQL-запросов к `{url}` не должно зависеть от '
+            f'размера страницы: {small} и {large}'
+        )
+        assert large <= budget, (
+            f'Запрос к `{url}` выполняет {large} SQL-запросов, '
+            f'допустимо не больше {budget}'
+        )
+
+    def test_titles_list(self, client, make_titles):
+        make_titles(2)
+        self.assert_budget(
+            client, '/api/v1/titles/', 3, lambda: make_titles(20)
+        )
+
+    def test_title_detail(self, client, make_titles, genres):
+        title, = make_titles(1)
+        self.assert_budget(
+            client, f'/api/v1/titles/{title.pk}/', 2,
+            lambda: title.genre.add(*genres)
+        )
+
+    def test_categories_and_genres_list(self, client, genres):
+        assert count_queries(client, '/api/v1/categories/') <= 2
+        assert count_queries(client, '/api/v1/genres/') <= 2
+
+    def test_reviews_list(self, client, make_titles, make_reviews):
+        title, = make_titles(1)
+        make_reviews(title, 2)
+        self.assert_budget(
+            client, f'/api/v1/titles/{title.pk}/reviews/', 2,
+            lambda: make_reviews(title, 20)
+        )
+
+    def test_reviews_list_with_latest_comments(self, client, make_titles,
+                                               make_reviews, make_comments):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, 2)
+
+        def grow():
+            for review in make_reviews(title, 10):
+                make_comments(review, 5)
+
+        self.assert_budget(
+            client,
+            f'/api/v1/titles/{title.pk}/reviews/?expand=latest_comments', 3,
+            grow
+        )
+
+    def test_comments_list(self, client, make_titles, make_reviews,
+                           make_comments):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, 2)
+        self.assert_budget(
+            client,
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/', 2,
+            lambda: make_comments(review, 20)
+        )
+
+    def test_users_list(self, admin_client, make_titles, make_reviews):
+        title, = make_titles(1)
+        make_reviews(title, 2)
+        self.assert_budget(
+            admin_client, '/api/v1/users/', 2,
+            lambda: make_reviews(title, 20)
+        )
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db
+class TestRankings:
+
+    @pytest.fixture
+    def ranked(self, make_titles, make_reviews, genres):
+        low, high, fresh = make_titles(3)
+        for title, count, score in ((low, 3, 4), (high, 3, 9), (fresh, 1, 10)):
+            for review in make_reviews(title, count):
+                review.score = score
+                review.save()
+        Review.objects.filter(title=high).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        fresh.genre.set(genres[:1])
+        Title.objects.recalculate_rating()
+        call_command('refresh_rankings', '--min-reviews', '2')
+        return low, high, fresh
+
+    def test_top(self, client, ranked):
+        low, high, fresh = ranked
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['title']['id'] for item in data] == [high.pk, low.pk]
+        assert data[0]['position'] == 1
+        assert data[0]['score'] == 9
+        assert data[0]['title']['rating'] == 9
+
+    def test_trending(self, client, ranked):
+        low, high, fresh = ranked
+        response = client.get('/api/v1/titles/trending/', {'limit': 1})
+        assert [item['title']['id'] for item in response.json()] == [low.pk]
+        assert response.json()[0]['reviews_count'] == 3
+
+    def test_scopes(self, client, ranked, genres, category):
+        low, high, fresh = ranked
+        response = client.get('/api/v1/titles/trending/',
+                              {'genre': genres[1].slug})
+        assert [item['title']['id'] for item in response.json()] == [low.pk]
+        response = client.get('/api/v1/titles/top/',
+                              {'category': category.slug})
+        assert len(response.json()) == 2
+        Category.objects.create(name='Книги', slug='books')
+        response = client.get('/api/v1/titles/top/', {'category': 'books'})
+        assert response.json() == []
+
+    def test_refresh_invalidates_cache(self, client, ranked):
+        low, high, fresh = ranked
+        assert len(client.get('/api/v1/titles/top/').json()) == 2
+        call_command('refresh_rankings', '--min-reviews', '1')
+        assert len(client.get('/api/v1/titles/top/').json()) == 3
@@ -0,0 +1,134 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from reviews.models import Review, Title
+
+
+def rating(title):
+    title.refresh_from_db()
+    return title.rating_sum, title.rating_count, title.rating
+
+
+@pytest.mark.django_db
+class TestRating:
+
+    def test_review_writes_keep_rating(self, user_client, admin_client,
+                                       make_titles):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        review_id = response.json()['id']
+        assert rating(title) == (4, 1, 4)
+        response = admin_client.post(url, {'text': 'Отзыв', 'score': 9})
+        assert response.status_code == 201
+        assert rating(title) == (13, 2, 6)
+        response = user_client.patch(f'{url}{review_id}/', {'score': 10})
+        assert response.status_code == 200
+        assert rating(title) == (19, 2, 9)
+        assert user_client.delete(f'{url}{review_id}/').status_code == 204
+        assert rating(title) == (9, 1, 9)
+        admin_review = Review.objects.get(title=title)
+        assert admin_client.delete(
+            f'{url}{admin_review.pk}/'
+        ).status_code == 204
+        assert rating(title) == (0, 0, None)
+        assert user_client.get(
+            f'/api/v1/titles/{title.pk}/'
+        ).json()['rating'] is None
+
+    def test_user_deletion_removes_scores(self, admin_client, make_titles,
+                                          make_reviews):
+        first, second = make_titles(2)
+        review, = make_reviews(first, 1)
+        Review.objects.create(title=second, author=review.author,
+                              text='Отзыв', score=9)
+        make_reviews(second, 1)
+        assert rating(first) == (5, 1, 5)
+        assert rating(second) == (14, 2, 7)
+        response = admin_client.delete(
+            f'/api/v1/users/{review.author.username}/'
+        )
+        assert response.status_code == 204
+        assert rating(first) == (0, 0, None)
+        assert rating(second) == (5, 1, 5)
+
+    def test_model_writes_keep_rating(self, make_titles, make_reviews):
+        first, second = make_titles(2)
+        review, = make_reviews(first, 1)
+        review.score = 8
+        review.save()
+        assert rating(first) == (8, 1, 8)
+        review.title = second
+        review.save()
+        assert rating(first) == (0, 0, None)
+        assert rating(second) == (8, 1, 8)
+        Review.objects.filter(pk=review.pk).delete()
+        assert rating(second) == (0, 0, None)
+
+    def test_recalculate_ratings_repairs_counters(self, make_titles,
+                                                  make_reviews):
+        first, second = make_titles(2)
+        make_reviews(first, 3)
+        Title.objects.update(rating_sum=100, rating_count=7, rating=1)
+        out = StringIO()
+        call_command('recalculate_ratings', '--batch-size', '1',
+                     stdout=out)
+        assert rating(first) == (15, 3, 5)
+        assert rating(second) == (0, 0, None)
+        assert 'Рейтинг пересчитан для 2 произведений' in out.getvalue()
+
+    def test_recalculate_ratings_selected_titles(self, make_titles,
+                                                 make_reviews):
+        first, second = make_titles(2)
+        make_reviews(first, 1)
+        make_reviews(second, 1)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        call_command('recalculate_ratings', '--title', str(first.pk),
+                     stdout=StringIO())
+        assert rating(first) == (5, 1, 5)
+        assert rating(second) == (0, 0, None)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_migration_fills_rating(self):
+        before = [('reviews', '0002_auto_20221120_1244'),
+                  ('users', '0001_initial')]
+        after = [('reviews', '0003_title_rating')]
+        executor = MigrationExecutor(connection)
+        latest = executor.loader.graph.leaf_nodes()
+        try:
+            executor.migrate(before)
+            apps = executor.loader.project_state(before).apps
+            users = apps.get_model('users', 'User').objects
+            categories = apps.get_model('reviews', 'Category').objects
+            titles = apps.get_model('reviews', 'Title').objects
+            reviews = apps.get_model('reviews', 'Review').objects
+            category = categories.create(name='Фильмы', slug='movies')
+            rated, empty = (
+                titles.create(name=name, year=2000, category=category)
+                for name in ('С отзывами', 'Без отзывов')
+            )
+            for number, score in enumerate((3, 8)):
+                author = users.create(username=f'author{number}',
+                                      email=f'author{number}@yamdb.fake')
+                reviews.create(title=rated, author=author, text='Отзыв',
+                               score=score)
+
+            executor = MigrationExecutor(connection)
+            executor.migrate(after)
+            titles = executor.loader.project_state(after).apps.get_model(
+                'reviews', 'Title'
+            ).objects
+            assert titles.values_list(
+                'rating_sum', 'rating_count', 'rating'
+            ).get(pk=rated.pk) == (11, 2, 5)
+            assert titles.values_list(
+                'rating_sum', 'rating_count', 'rating'
+            ).get(pk=empty.pk) == (0, 0, None)
+        finally:
+            executor = MigrationExecutor(connection)
+            executor.loader.build_graph()
+            executor.migrate(latest)
@@ -0,0 +1,70 @@
+import gzip
+import json
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from api.renderers import FastJSONParser, FastJSONRenderer
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+
+class TestFastJSON:
+
+    def test_matches_stdlib(self):
+        data = {'name': 'Фильм\u2028', 'price': Decimal('1.50'),
+                'items': [1, None, True], 'nested': {'x': 1.5}}
+        fast = FastJSONRenderer().render(data)
+        assert json.loads(fast) == json.loads(JSONRenderer().render(data))
+        assert '\u2028'.encode() not in fast
+
+    def test_indent_falls_back(self):
+        content = FastJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=2'
+        )
+        assert content == b'{\n  "a": 1\n}'
+
+    def test_parser(self):
+        parser = FastJSONParser()
+        assert parser.parse(BytesIO('{"a": "б"}'.encode())) == {'a': 'б'}
+        with pytest.raises(ParseError):
+            parser.parse(BytesIO(b'{'))
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    def test_gzip_large_response(self, client, make_titles):
+        make_titles(20)
+        response = client.get('/api/v1/titles/',
+                              HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        data = json.loads(gzip.decompress(response.content))
+        assert len(data['results']) == 20
+
+        etag = response['ETag']
+        assert etag.startswith('W/')
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag,
+                              HTTP_ACCEPT_ENCODING='gzip')
+        assert response.status_code == 304
+
+    def test_small_or_refused(self, client, make_titles):
+        make_titles(1)
+        response = client.get('/api/v1/genres/',
+                              HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding')
+        make_titles(20)
+        response = client.get('/api/v1/titles/',
+                              HTTP_ACCEPT_ENCODING='gzip;q=0')
+        assert not response.has_header('Content-Encoding')
+
+    def test_precompressed_export_untouched(self, admin_client, make_titles,
+                                            make_reviews):
+        title, = make_titles(1)
+        make_reviews(title, 30)
+        response = admin_client.get('/api/v1/export/reviews/',
+                                    {'gzip': '1'},
+                                    HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding')
+        assert gzip.decompress(b''.join(response.streaming_content))
@@ -0,0 +1,122 @@
+import pytest
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Title
+from users.models import User
+
+from api_yamdb.db import replicas
+
+
+@pytest.fixture
+def replica(settings, monkeypatch):
+    settings.REPLICA_DATABASES = ['replica0']
+    settings.REPLICA_CHECK_INTERVAL = 60
+    monkeypatch.setattr(replicas, '_health', {})
+    monkeypatch.setattr(replicas, 'replica_lag', lambda alias: 0)
+    cache.clear()
+    return 'replica0'
+
+
+def read_alias(request):
+    """Алиас, с которого роутер читал бы при обработке запроса."""
+    seen = []
+
+    def view(request):
+        seen.append(replicas.ReplicaRouter().db_for_read(Title))
+        return 'ответ'
+
+    replicas.ReplicaMiddleware(view)(request)
+    return seen[0]
+
+
+class TestReplicaRouting:
+    factory = RequestFactory()
+
+    def test_safe_requests_read_from_replica(self, replica):
+        assert read_alias(self.factory.get('/api/v1/titles/')) == replica
+        assert read_alias(self.factory.head('/api/v1/titles/')) == replica
+
+    def test_writes_and_background_use_default(self, replica):
+        router = replicas.ReplicaRouter()
+        assert router.db_for_read(Title) == 'default'
+        assert router.db_for_write(Title) == 'default'
+        assert not router.allow_migrate(replica, 'reviews')
+        assert read_alias(self.factory.post('/api/v1/titles/')) == 'default'
+
+    def test_client_pinned_after_write(self, replica, settings):
+        token = {'HTTP_AUTHORIZATION': 'Bearer author'}
+        replicas.ReplicaMiddleware(lambda request: None)(
+            self.factory.post('/api/v1/titles/1/reviews/', **token)
+        )
+        assert read_alias(
+            self.factory.get('/api/v1/titles/1/reviews/', **token)
+        ) == 'default'
+        other = {'HTTP_AUTHORIZATION': 'Bearer reader'}
+        assert read_alias(
+            self.factory.get('/api/v1/titles/1/reviews/', **other)
+        ) == replica
+
+    def test_anonymous_pinned_by_forwarded_address(self, replica):
+        # Все анонимы приходят с адреса nginx, различает их X-Forwarded-For
+        nginx = {'REMOTE_ADDR': '172.18.0.5'}
+        writer = {**nginx, 'HTTP_X_FORWARDED_FOR': '203.0.113.7'}
+        reader = {**nginx, 'HTTP_X_FORWARDED_FOR': '198.51.100.2'}
+        replicas.ReplicaMiddleware(lambda request: None)(
+            self.factory.post('/api/v1/auth/signup/', **writer)
+        )
+        assert read_alias(
+            self.factory.get('/api/v1/titles/', **writer)
+        ) == 'default'
+        assert read_alias(
+            self.factory.get('/api/v1/titles/', **reader)
+        ) == replica
+
+    @pytest.mark.parametrize('lag', [DatabaseError, 30])
+    def test_unhealthy_replica_falls_back(self, replica, settings,
+                                          monkeypatch, lag):
+        settings.REPLICA_MAX_LAG = 5
+
+        def replica_lag(alias):
+            if lag is DatabaseError:
+                raise DatabaseError('нет соединения')
+            return lag
+
+        monkeypatch.setattr(replicas, 'replica_lag', replica_lag)
+        assert read_alias(self.factory.get('/api/v1/titles/')) == 'default'
+
+    def test_health_is_cached(self, replica, monkeypatch):
+        calls = []
+        monkeypatch.setattr(replicas, 'replica_lag',
+                            lambda alias: calls.append(alias))
+        for _ in range(3):
+            read_alias(self.factory.get('/api/v1/titles/'))
+        assert calls == [replica]
+
+    def test_no_replicas_configured(self, settings):
+        settings.REPLICA_DATABASES = []
+        assert read_alias(self.factory.get('/api/v1/titles/')) == 'default'
+
+    @pytest.mark.django_db
+    def test_shared_caches_filled_from_default(self, replica, user,
+                                               make_titles, monkeypatch):
+        title, = make_titles(1)
+        seen = []
+        db_for_read = replicas.ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            seen.append((model, replicas._read_alias.get()))
+            return db_for_read(router, model, **hints)
+
+        monkeypatch.setattr(replicas.ReplicaRouter, 'db_for_read', spy)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.pk}/'):
+            assert client.get(url).status_code == 200
+        models = {model for model, alias in seen}
+        assert {User, Title} <= models
+        assert {alias for model, alias in seen} == {None}
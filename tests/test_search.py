@@ -0,0 +1,50 @@
+import pytest
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    @pytest.fixture
+    def titles(self, category):
+        return [
+            Title.objects.create(name=name, year=2000, description=text,
+                                 category=category)
+            for name, text in (
+                ('Крёстный отец', 'Семейная сага о мафии'),
+                ('Отец невесты', 'Комедия о свадьбе'),
+                ('Гладиатор', 'Исторический фильм, где отец мстит'),
+                ('Титаник', 'Фильм о крушении'),
+            )
+        ]
+
+    def search(self, client, term):
+        response = client.get('/api/v1/titles/', {'search': term})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_name_matches_rank_above_description(self, client, titles):
+        found = self.search(client, 'отец')
+        assert set(found[:2]) == {'Крёстный отец', 'Отец невесты'}
+        assert 'Гладиатор' in found
+        assert 'Титаник' not in found
+
+    def test_index_follows_saves(self, client, titles):
+        titanic = titles[-1]
+        titanic.name = 'Аватар'
+        titanic.save()
+        assert self.search(client, 'аватар') == ['Аватар']
+        assert self.search(client, 'титаник') == []
+        titanic.delete()
+        assert self.search(client, 'аватар') == []
+
+    def test_cursor_mode_keeps_relevance(self, client, titles):
+        response = client.get('/api/v1/titles/', {
+            'search': 'отец', 'pagination': 'cursor',
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' in data
+        assert [title['name'] for title in data['results']][-1] == (
+            'Гладиатор'
+        )
@@ -0,0 +1,68 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def select_sql(context, table):
+    return next(query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+                and f'FROM "{table}"' in query['sql']
+                and 'COUNT' not in query['sql'])
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_full_by_default(self, client, make_titles):
+        make_titles(1)
+        item = client.get('/api/v1/titles/').json()['results'][0]
+        assert item['category'] == {'name': 'Фильмы', 'slug': 'movies'}
+        assert 'description' in item
+
+    def test_titles_fields_and_columns(self, client, make_titles):
+        make_titles(2)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/',
+                                  {'fields': 'id,name,category,genre'})
+        item = response.json()['results'][0]
+        assert set(item) == {'id', 'name', 'category', 'genre'}
+        assert item['category'] == 'movies'
+        assert item['genre'] == ['drama', 'comedy']
+        sql = select_sql(context, 'reviews_title')
+        assert '"description"' not in sql
+        assert '"reviews_category"."name"' not in sql
+
+    def test_expand(self, client, make_titles):
+        make_titles(1)
+        item = client.get('/api/v1/titles/', {
+            'fields': 'id,category', 'expand': 'category',
+        }).json()['results'][0]
+        assert item['category'] == {'name': 'Фильмы', 'slug': 'movies'}
+
+    def test_reviews_without_text(self, client, make_titles, make_reviews):
+        title, = make_titles(1)
+        make_reviews(title, 2)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'/api/v1/titles/{title.pk}/reviews/',
+                                  {'fields': 'id,author,score'})
+        item = response.json()['results'][0]
+        assert set(item) == {'id', 'author', 'score'}
+        assert item['author'].startswith('reviewer')
+        assert '"text"' not in select_sql(context, 'reviews_review')
+
+    def test_retrieve_etag_varies(self, client, make_titles):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.pk}/'
+        full = client.get(url)
+        sparse = client.get(url, {'fields': 'name'})
+        assert sparse.json() == {'name': title.name}
+        assert full['ETag'] != sparse['ETag']
+
+    def test_writes_ignore_fields(self, user_client, make_titles):
+        title, = make_titles(1)
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/?fields=id',
+            {'text': 'Отзыв', 'score': 5},
+        )
+        assert response.status_code == 201
+        assert response.json()['text'] == 'Отзыв'
@@ -0,0 +1,80 @@
+import pytest
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def review(self, client, title, score):
+        return client.post(f'/api/v1/titles/{title.pk}/reviews/', {
+            'text': 'Отзыв', 'score': score,
+        })
+
+    def test_counters_follow_review_writes(self, admin_client, user_client,
+                                           make_titles):
+        title, = make_titles(1)
+        self.review(admin_client, title, 10)
+        review_id = self.review(user_client, title, 3).json()['id']
+        url = f'/api/v1/titles/{title.pk}/stats/'
+        data = admin_client.get(url).json()
+        assert data['count'] == 2
+        assert data['mean'] == 6.5
+        assert data['median'] == 6.5
+        assert data['histogram']['10'] == 1
+        assert data['histogram']['3'] == 1
+
+        user_client.patch(
+            f'/api/v1/titles/{title.pk}/reviews/{review_id}/', {'score': 4}
+        )
+        assert admin_client.get(url).json()['histogram']['4'] == 1
+        user_client.delete(f'/api/v1/titles/{title.pk}/reviews/{review_id}/')
+        data = admin_client.get(url).json()
+        assert (data['count'], data['median']) == (1, 10)
+        assert sum(data['histogram'].values()) == 1
+
+    def test_author_deletion_updates_stats(self, admin_client, make_titles,
+                                           make_reviews):
+        title, = make_titles(1)
+        kept, removed = make_reviews(title, 2)
+        Review.objects.filter(pk=removed.pk).update(score=9)
+        Title.objects.filter(pk=title.pk).recalculate_rating()
+        url = f'/api/v1/titles/{title.pk}/stats/'
+        data = admin_client.get(url).json()
+        assert (data['count'], data['median']) == (2, 7)
+        response = admin_client.delete(
+            f'/api/v1/users/{removed.author.username}/'
+        )
+        assert response.status_code == 204
+        data = admin_client.get(url).json()
+        assert (data['count'], data['mean'], data['median']) == (1, 5, 5)
+        assert data['histogram']['9'] == 0
+        assert data['histogram']['5'] == 1
+
+    def test_empty_title(self, client, make_titles):
+        title, = make_titles(1)
+        data = client.get(f'/api/v1/titles/{title.pk}/stats/').json()
+        assert (data['count'], data['mean'], data['median']) == (0, None, None)
+
+    def test_unknown_title(self, client):
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+        assert client.get('/api/v1/titles/abc/stats/').status_code == 404
+
+    def test_batch(self, client, make_titles, make_reviews):
+        first, second, third = make_titles(3)
+        make_reviews(first, 3)
+        Review.objects.filter(title=first).update(score=2)
+        make_reviews(second, 1)
+        Title.objects.recalculate_rating()
+        response = client.get('/api/v1/titles/stats/', {
+            'ids': f'{second.pk},{first.pk},100500',
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['id'] for item in data] == [first.pk, second.pk]
+        assert data[0]['histogram']['2'] == 3
+        assert data[1]['median'] == 5
+
+    def test_batch_validation(self, client):
+        assert client.get('/api/v1/titles/stats/').status_code == 400
+        response = client.get('/api/v1/titles/stats/', {'ids': '1,x'})
+        assert response.status_code == 400
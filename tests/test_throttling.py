@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+from api.throttling import SlidingWindowThrottle
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    rates = {'auth_ip': '100/min', 'auth_identity': '2/min',
+             'reviews': '2/min', 'comments': '2/min'}
+    monkeypatch.setattr(SlidingWindowThrottle, 'THROTTLE_RATES', rates)
+    return rates
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def signup(self, client, username, email):
+        return client.post('/api/v1/auth/signup/', {
+            'username': username, 'email': email,
+        })
+
+    def test_identity_bucket(self, client, rates):
+        codes = [
+            self.signup(client, 'newbie', 'newbie@yamdb.fake').status_code
+            for _ in range(3)
+        ]
+        assert codes == [200, 400, 429]
+        response = self.signup(client, 'other', 'newbie@yamdb.fake')
+        assert response.status_code == 429
+        assert 'Retry-After' in response
+        response = self.signup(client, 'other', 'other@yamdb.fake')
+        assert response.status_code == 200
+
+    def test_ip_bucket(self, client, rates):
+        rates['auth_ip'] = '2/min'
+        for number in range(2):
+            self.signup(client, f'user{number}', f'user{number}@yamdb.fake')
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'user0', 'confirmation_code': 'wrong',
+        })
+        assert response.status_code == 429
+        response = APIClient(REMOTE_ADDR='10.0.0.2').post(
+            '/api/v1/auth/token/', {
+                'username': 'user1', 'confirmation_code': 'wrong',
+            }
+        )
+        assert response.status_code != 429
+
+    def test_limit_frees_up(self, client, rates, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(SlidingWindowThrottle, 'timer',
+                            lambda self: now[0])
+        for number in range(2):
+            self.signup(client, 'newbie', 'newbie@yamdb.fake')
+        assert self.signup(
+            client, 'newbie', 'newbie@yamdb.fake'
+        ).status_code == 429
+        # Через период предыдущее окно учитывается лишь частично
+        now[0] += 60
+        assert self.signup(
+            client, 'newbie', 'newbie@yamdb.fake'
+        ).status_code == 400
+
+    def test_review_writes(self, user_client, rates, make_titles):
+        titles = make_titles(3)
+        codes = [
+            user_client.post(f'/api/v1/titles/{title.pk}/reviews/', {
+                'text': 'Отзыв', 'score': 5,
+            }).status_code
+            for title in titles
+        ]
+        assert codes == [201, 201, 429]
+        url = f'/api/v1/titles/{titles[0].pk}/reviews/'
+        assert user_client.get(url).status_code == 200
+
+    def test_review_batch_charges_each_item(self, user_client, rates,
+                                            make_titles):
+        titles = make_titles(3)
+        items = [{'title': title.pk, 'text': 'Отзыв', 'score': 5}
+                 for title in titles]
+        response = user_client.post('/api/v1/batch/reviews/', items,
+                                    format='json')
+        assert response.status_code == 429
+        response = user_client.post('/api/v1/batch/reviews/', items[:2],
+                                    format='json')
+        assert response.status_code == 200
+        assert user_client.post(
+            f'/api/v1/titles/{titles[2].pk}/reviews/',
+            {'text': 'Отзыв', 'score': 5},
+        ).status_code == 429
+
+
+class SlowCache:
+    """Кэш, уступающий другим потокам после каждой операции."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def slow(*args, **kwargs):
+            result = method(*args, **kwargs)
+            time.sleep(0.01)
+            return result
+
+        return slow
+
+
+class OneKeyThrottle(SlidingWindowThrottle):
+    rate = '3/min'
+
+    def get_cache_key(self, request, view):
+        return 'throttle_test_one_key'
+
+
+def test_concurrent_requests_do_not_exceed_limit(monkeypatch):
+    cache.clear()
+    slow = SlowCache(cache)
+    monkeypatch.setattr(SlidingWindowThrottle, 'cache',
+                        property(lambda self: slow))
+    results = []
+
+    def request():
+        results.append(OneKeyThrottle().allow_request(None, None))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 3